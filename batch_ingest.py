@@ -0,0 +1,289 @@
+import json
+import math
+import sys
+import time
+from collections import Counter
+
+from db_connection import transaction
+from database import insert_goal, insert_milestone, get_milestones
+from log_work_pipeline import record_work, apply_learning
+
+BATCH_SIZE = 1000          # commands per transaction
+MAX_REPORTED_ERRORS = 20
+
+NUMBER = (int, float)
+
+# command -> {field: accepted types}
+COMMANDS = {
+    "add_goal": {"title": str, "deadline_days": NUMBER},
+    "add_milestone": {"goal_id": int, "title": str, "total_hours": NUMBER},
+    "log_work": {"milestone_id": int, "hours": NUMBER},
+    "briefing": {},
+}
+
+# Stream-local names, so a file can reference rows it creates:
+# {"command": "add_goal", "ref": "g1", ...} then
+# {"command": "add_milestone", "goal_ref": "g1", ...}
+REF_FIELDS = {
+    "goal_id": "goal_ref",
+    "milestone_id": "milestone_ref",
+}
+
+# Numeric fields: must be finite, > 0 and at most this
+MAX_VALUES = {
+    "deadline_days": 36500,     # 100 years
+    "total_hours": 100000,
+    "hours": 1000,
+}
+
+
+class CommandError(ValueError):
+    pass
+
+
+# ==================================================
+# VALIDATION
+# ==================================================
+
+def parse_command(line):
+    """
+    One JSONL line -> (command, fields, ref). A *_ref field is kept
+    as {"ref": name} and resolved when the command is applied.
+    Raises CommandError with a readable reason.
+    """
+
+    try:
+        record = json.loads(line)
+    except ValueError as e:
+        raise CommandError(f"invalid JSON ({e})")
+
+    if not isinstance(record, dict):
+        raise CommandError("expected a JSON object")
+
+    command = record.get("command")
+    if command not in COMMANDS:
+        raise CommandError(f"unknown command {command!r}")
+
+    fields = {}
+
+    for name, types in COMMANDS[command].items():
+        ref_name = REF_FIELDS.get(name)
+
+        if name not in record and ref_name in record:
+            fields[name] = {"ref": _ref_name(record[ref_name], ref_name)}
+            continue
+
+        value = record.get(name)
+
+        # bool is an int subclass; never accept it as a number
+        if isinstance(value, bool) or not isinstance(value, types):
+            raise CommandError(f"{command}: {name} missing or not {_type_name(types)}")
+
+        if isinstance(value, str) and not value.strip():
+            raise CommandError(f"{command}: {name} cannot be empty")
+
+        if name in MAX_VALUES:
+            # json.loads accepts NaN / Infinity
+            if not math.isfinite(value) or value <= 0:
+                raise CommandError(f"{command}: {name} must be a positive finite number")
+            if value > MAX_VALUES[name]:
+                raise CommandError(f"{command}: {name} must be at most {MAX_VALUES[name]}")
+
+        fields[name] = value.strip() if isinstance(value, str) else value
+
+    ref = record.get("ref")
+    return command, fields, None if ref is None else _ref_name(ref, "ref")
+
+
+def _ref_name(value, field):
+    if isinstance(value, bool) or not isinstance(value, (str, int)):
+        raise CommandError(f"{field} must be a string or integer")
+    return value
+
+
+def _type_name(types):
+    return "a number" if types is NUMBER else f"a {types.__name__}"
+
+
+# ==================================================
+# BATCH APPLICATION
+# ==================================================
+
+class BatchIngestor:
+    """
+    Applies validated commands BATCH_SIZE at a time in one transaction.
+    log_work learning side effects (reward, transition, plan reward)
+    are collected per batch and applied after it commits, with one
+    vectorised TD update.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, learn=True, out=sys.stdout):
+        self.batch_size = batch_size
+        self.learn = learn
+        self.out = out
+        self.refs = {}
+        self.pending = []
+        self.counts = Counter()
+        self.errors = []
+        self.transitions = 0
+        self.skipped_learning = 0
+        self.batches = 0
+
+    # ---------------- Intake ----------------
+
+    def feed(self, line_no, line):
+        if not line.strip():
+            return
+
+        self.counts["total"] += 1
+
+        try:
+            command, fields, ref = parse_command(line)
+        except CommandError as e:
+            self._reject(line_no, str(e))
+            return
+
+        if command == "briefing":
+            self.flush()
+            self._briefing()
+            self.counts["briefing"] += 1
+            return
+
+        self.pending.append((line_no, command, fields, ref))
+
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def _reject(self, line_no, reason):
+        self.counts["invalid"] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_no, reason))
+
+    # ---------------- Apply ----------------
+
+    def flush(self):
+        if not self.pending:
+            return
+
+        learning = []
+        committed_refs = dict(self.refs)
+
+        try:
+            self._apply_pending(learning)
+        except BaseException:
+            # Rolled back: forget refs to rows that no longer exist
+            self.refs = committed_refs
+            raise
+
+        self.pending = []
+        self.batches += 1
+
+        # Rewards, transitions and one TD update for the whole batch
+        apply_learning(learning, learn=self.learn)
+        self.transitions += len(learning)
+
+    def _apply_pending(self, learning):
+        with transaction(immediate=True) as c:
+            for line_no, command, fields, ref in self.pending:
+                try:
+                    fields = self._resolve(fields)
+                    row_id = self._apply(c, command, fields, learning)
+                except CommandError as e:
+                    self._reject(line_no, str(e))
+                    continue
+
+                self.counts[command] += 1
+                if ref is not None:
+                    self.refs[ref] = row_id
+
+    def _resolve(self, fields):
+        resolved = dict(fields)
+
+        for name, value in fields.items():
+            if isinstance(value, dict):
+                if value["ref"] not in self.refs:
+                    raise CommandError(
+                        f"{REF_FIELDS[name]} {value['ref']!r} not defined earlier in the stream"
+                    )
+                resolved[name] = self.refs[value["ref"]]
+
+        return resolved
+
+    def _apply(self, c, command, fields, learning):
+        if command == "add_goal":
+            return insert_goal(c, fields["title"], fields["deadline_days"])
+
+        if command == "add_milestone":
+            c.execute("SELECT 1 FROM goals WHERE id = ?", (fields["goal_id"],))
+            if c.fetchone() is None:
+                raise CommandError(f"add_milestone: goal {fields['goal_id']} does not exist")
+
+            return insert_milestone(c, fields["goal_id"], fields["title"], fields["total_hours"])
+
+        # log_work
+        try:
+            _, _, sample = record_work(c, fields["milestone_id"], fields["hours"])
+        except LookupError as e:
+            raise CommandError(f"log_work: {e}")
+
+        if sample is None:
+            # No plan yet for this milestone: nothing to learn from
+            self.skipped_learning += 1
+        else:
+            learning.append(sample)
+
+        return fields["milestone_id"]
+
+    def _briefing(self):
+        from scheduler import generate_operator_briefing
+
+        milestones = get_milestones()
+
+        if milestones:
+            generate_operator_briefing(milestones)
+        else:
+            print("No milestones found.", file=self.out)
+
+    # ---------------- Report ----------------
+
+    def report(self, elapsed):
+        total = self.counts["total"]
+        applied = sum(self.counts[c] for c in COMMANDS)
+        rate = total / elapsed if elapsed > 0 else float("inf")
+
+        print("\n===== BATCH INGESTION REPORT =====", file=self.out)
+        print(f"Commands read:     {total}", file=self.out)
+
+        for command in COMMANDS:
+            print(f"  {command:<16} {self.counts[command]}", file=self.out)
+
+        print(f"Applied:           {applied}", file=self.out)
+        print(f"Rejected:          {self.counts['invalid']}", file=self.out)
+        print(f"Batches committed: {self.batches}", file=self.out)
+        print(f"TD transitions:    {self.transitions} "
+              f"({self.skipped_learning} work logs without a plan)", file=self.out)
+        print(f"Elapsed:           {elapsed:.2f}s ({rate:,.0f} commands/sec)", file=self.out)
+
+        for line_no, reason in sorted(self.errors):
+            print(f"  line {line_no}: {reason}", file=self.out)
+
+        if self.counts["invalid"] > len(self.errors):
+            print(f"  ... {self.counts['invalid'] - len(self.errors)} more", file=self.out)
+
+
+def ingest(stream, batch_size=BATCH_SIZE, learn=True, out=sys.stdout):
+    """
+    Applies a JSONL command stream and prints the throughput report.
+    Returns the BatchIngestor (counts, errors) for callers.
+    """
+
+    ingestor = BatchIngestor(batch_size, learn=learn, out=out)
+    start = time.perf_counter()
+
+    for line_no, line in enumerate(stream, 1):
+        ingestor.feed(line_no, line)
+
+    ingestor.flush()
+    ingestor.report(time.perf_counter() - start)
+
+    return ingestor
@@ -0,0 +1,31 @@
+import pytest
+
+import db_connection
+
+
+@pytest.fixture
+def temp_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(db_connection, "DB_NAME", str(tmp_path / "tasks.db"))
+
+    from database import init_db
+    init_db()
+
+    yield
+    db_connection.close_connection()
+
+
+@pytest.fixture
+def temp_q_store(tmp_path, monkeypatch):
+    # Keep td_learning's Q-table files out of the working directory
+    import td_learning
+
+    snapshot = str(tmp_path / "q_table.json")
+    monkeypatch.setattr(td_learning.store, "snapshot_path", snapshot)
+    monkeypatch.setattr(td_learning.store, "log_path", snapshot + ".log")
+    monkeypatch.setattr(td_learning.store, "_log", None)
+    monkeypatch.setattr(td_learning.store, "_pending", 0)
+
+    yield td_learning.store
+
+    if td_learning.store._log is not None:
+        td_learning.store._log.close()
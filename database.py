@@ -1,7 +1,12 @@
-import sqlite3
-from datetime import datetime
+import json
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 
-DB_NAME = "tasks.db"
+import numpy as np
+
+from db_connection import get_connection, transaction
+from execution_phase import advance_execution_phase
+from migrations import migrate
 
 
 # ==================================================
@@ -9,7 +14,7 @@ DB_NAME = "tasks.db"
 # ==================================================
 
 def init_db():
-    conn = sqlite3.connect(DB_NAME)
+    conn = get_connection()
     c = conn.cursor()
 
     # ---------------- Goals ----------------
@@ -93,14 +98,93 @@ def init_db():
     """)
 
     conn.commit()
-    conn.close()
+
+    migrate()
+
+
+# ==================================================
+# GOALS & MILESTONES
+# ==================================================
+# insert_* take the caller's cursor so batch ingestion can
+# apply many of them in one transaction.
+
+def insert_goal(c, title, deadline_days):
+    deadline = datetime.now() + timedelta(days=deadline_days)
+
+    c.execute("""
+    INSERT INTO goals (title, deadline)
+    VALUES (?, ?)
+    """, (title, deadline.isoformat()))
+
+    return c.lastrowid
+
+
+def add_goal(title, deadline_days):
+    with transaction() as c:
+        return insert_goal(c, title, deadline_days)
+
+
+def insert_milestone(c, goal_id, title, total_hours):
+    c.execute("""
+    INSERT INTO milestones (goal_id, title, total_hours)
+    VALUES (?, ?, ?)
+    """, (goal_id, title, total_hours))
+
+    return c.lastrowid
+
+
+def add_milestone(goal_id, title, total_hours):
+    with transaction() as c:
+        return insert_milestone(c, goal_id, title, total_hours)
+
+
+def get_goals():
+    c = get_connection().cursor()
+
+    c.execute("""
+    SELECT id, title, deadline
+    FROM goals
+    ORDER BY id
+    """)
+
+    return [{"id": r[0], "title": r[1], "deadline": r[2]} for r in c.fetchall()]
+
+
+def get_milestones():
+    """
+    Open milestones with their goal's deadline and running totals.
+    """
+
+    c = get_connection().cursor()
+
+    c.execute("""
+    SELECT m.id, m.goal_id, m.title, m.total_hours, g.deadline,
+           m.logged_hours, m.remaining_hours
+    FROM milestones m
+    JOIN goals g ON g.id = m.goal_id
+    WHERE m.actual_completion IS NULL
+    ORDER BY m.id
+    """)
+
+    return [
+        {
+            "id": r[0],
+            "goal_id": r[1],
+            "title": r[2],
+            "total_hours": r[3],
+            "deadline": r[4],
+            "logged_hours": r[5],
+            "remaining_hours": r[6]
+        }
+        for r in c.fetchall()
+    ]
 
 
 # ==================================================
 # EXECUTION UNIT ENGINE (DYNAMIC CHUNK RESIZING)
 # ==================================================
 
-def generate_execution_units(milestone_id, remaining_hours, adaptive_capacity, phase):
+def compute_chunk_size(adaptive_capacity, phase):
 
     MIN_CHUNK = 0.5
     MAX_CHUNK = 4
@@ -113,28 +197,63 @@ def generate_execution_units(milestone_id, remaining_hours, adaptive_capacity, p
         multiplier = 0.4
 
     optimal_chunk = adaptive_capacity * multiplier
-    chunk_size = max(MIN_CHUNK, min(MAX_CHUNK, optimal_chunk))
+    return max(MIN_CHUNK, min(MAX_CHUNK, optimal_chunk))
 
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
 
-    while remaining_hours > 0:
-        size = min(chunk_size, remaining_hours)
+def split_into_chunks(remaining_hours, chunk_size):
+    """
+    Full chunks of chunk_size plus one remainder chunk.
+    """
 
-        c.execute("""
+    if remaining_hours <= 0:
+        return []
+
+    full_chunks, rest = divmod(remaining_hours, chunk_size)
+    sizes = [chunk_size] * int(full_chunks)
+
+    if rest > 1e-9:
+        sizes.append(rest)
+
+    return sizes
+
+
+def generate_execution_units_bulk(milestones, adaptive_capacity, phase):
+    """
+    milestones: iterable of (milestone_id, remaining_hours).
+    Chunks all of them up front and inserts every unit
+    with one executemany in a single transaction.
+    """
+
+    chunk_size = compute_chunk_size(adaptive_capacity, phase)
+
+    rows = [
+        (milestone_id, size)
+        for milestone_id, remaining_hours in milestones
+        for size in split_into_chunks(remaining_hours, chunk_size)
+    ]
+
+    if not rows:
+        return 0
+
+    with transaction() as c:
+        c.executemany("""
         INSERT INTO execution_units (milestone_id, estimated_hours)
         VALUES (?, ?)
-        """, (milestone_id, size))
+        """, rows)
 
-        remaining_hours -= size
+    return len(rows)
 
-    conn.commit()
-    conn.close()
+
+def generate_execution_units(milestone_id, remaining_hours, adaptive_capacity, phase):
+    return generate_execution_units_bulk(
+        [(milestone_id, remaining_hours)],
+        adaptive_capacity,
+        phase
+    )
 
 
 def get_pending_units(milestone_id):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
+    c = get_connection().cursor()
 
     c.execute("""
     SELECT id, estimated_hours
@@ -145,110 +264,527 @@ def get_pending_units(milestone_id):
     """, (milestone_id,))
 
     rows = c.fetchall()
-    conn.close()
 
     return [{"id": r[0], "hours": r[1]} for r in rows]
 
 
 def mark_unit_completed(unit_id):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
-
-    c.execute("""
-    UPDATE execution_units
-    SET completed = 1
-    WHERE id = ?
-    """, (unit_id,))
-
-    conn.commit()
-    conn.close()
+    with transaction() as c:
+        c.execute("""
+        UPDATE execution_units
+        SET completed = 1
+        WHERE id = ?
+        """, (unit_id,))
 
 
 # ==================================================
-# ESTIMATION TRACKING
+# WORK LOGS (RUNNING TOTALS)
 # ==================================================
+# milestones.logged_hours is maintained by the logs triggers
+# (migration 6) inside the same transaction as the INSERT;
+# remaining_hours is a generated column.
 
-def update_predicted_completion(milestone_id, predicted_date):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
+def insert_work_log(c, milestone_id, hours):
+    # Cursor-level log_work, for callers batching several writes
+    c.execute("""
+    INSERT INTO logs (milestone_id, hours_logged)
+    VALUES (?, ?)
+    """, (milestone_id, hours))
 
     c.execute("""
-    UPDATE milestones
-    SET predicted_completion = ?
+    SELECT logged_hours, remaining_hours
+    FROM milestones
     WHERE id = ?
-    """, (predicted_date, milestone_id))
+    """, (milestone_id,))
 
-    conn.commit()
-    conn.close()
+    return c.fetchone()
 
 
-def mark_milestone_completed(milestone_id):
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
+def log_work(milestone_id, hours):
+    """
+    Appends a work log and returns the milestone's updated
+    (logged_hours, remaining_hours), all in one transaction.
+    """
+
+    with transaction() as c:
+        return insert_work_log(c, milestone_id, hours)
+
+
+def get_logged_hours(milestone_id):
+    c = get_connection().cursor()
 
     c.execute("""
-    SELECT predicted_completion
+    SELECT logged_hours
     FROM milestones
     WHERE id = ?
     """, (milestone_id,))
 
     row = c.fetchone()
-    predicted = row[0] if row else None
+    return row[0] if row else 0
+
 
-    actual = datetime.now()
-    error_days = 0
+def verify_logged_hours():
+    """
+    Milestones whose running total disagrees with SUM(logs):
+    [(milestone_id, stored, actual)].
+    """
 
-    if predicted:
-        predicted_dt = datetime.fromisoformat(predicted)
-        error_days = (actual - predicted_dt).days
+    c = get_connection().cursor()
 
     c.execute("""
-    UPDATE milestones
-    SET actual_completion = ?, estimation_error_days = ?
-    WHERE id = ?
-    """, (actual.isoformat(), error_days, milestone_id))
+    SELECT m.id, m.logged_hours, COALESCE(l.total, 0)
+    FROM milestones m
+    LEFT JOIN (
+        SELECT milestone_id, SUM(hours_logged) AS total
+        FROM logs
+        GROUP BY milestone_id
+    ) l ON l.milestone_id = m.id
+    WHERE ABS(m.logged_hours - COALESCE(l.total, 0)) > 1e-9
+    """)
+
+    return c.fetchall()
 
-    conn.commit()
-    conn.close()
+
+def rebuild_logged_hours():
+    """
+    Resets every drifted running total to SUM(logs).
+    Returns the number of milestones corrected.
+    """
+
+    drift = verify_logged_hours()
+
+    with transaction() as c:
+        c.executemany("""
+        UPDATE milestones
+        SET logged_hours = ?
+        WHERE id = ?
+        """, [(actual, milestone_id) for milestone_id, _, actual in drift])
+
+    return len(drift)
+
+
+# ==================================================
+# BRIEFING SNAPSHOT (SET-BASED LOADERS)
+# ==================================================
+# One grouped query per table for all milestone ids,
+# passed as a single JSON array parameter.
+
+def load_milestone_rows(milestone_ids):
+    c = get_connection().cursor()
+
+    c.execute("""
+    SELECT id, goal_id, title, total_hours, predicted_completion
+    FROM milestones
+    WHERE id IN (SELECT value FROM json_each(?))
+    """, (json.dumps(list(milestone_ids)),))
+
+    return {
+        r[0]: {
+            "id": r[0],
+            "goal_id": r[1],
+            "title": r[2],
+            "total_hours": r[3],
+            "predicted_completion": r[4]
+        }
+        for r in c.fetchall()
+    }
+
+
+def load_logged_hours(milestone_ids):
+    c = get_connection().cursor()
+
+    # Running totals kept on the milestone row (see log_work)
+    c.execute("""
+    SELECT id, logged_hours
+    FROM milestones
+    WHERE id IN (SELECT value FROM json_each(?))
+    """, (json.dumps(list(milestone_ids)),))
+
+    return {r[0]: r[1] or 0 for r in c.fetchall()}
+
+
+def load_pending_units(milestone_ids):
+    c = get_connection().cursor()
+
+    c.execute("""
+    SELECT milestone_id, id, estimated_hours
+    FROM execution_units
+    WHERE milestone_id IN (SELECT value FROM json_each(?))
+    AND completed = 0
+    ORDER BY milestone_id, id
+    """, (json.dumps(list(milestone_ids)),))
+
+    pending = defaultdict(list)
+
+    for r in c.fetchall():
+        pending[r[0]].append({"id": r[1], "hours": r[2]})
+
+    return pending
+
+
+def load_briefing_snapshot(milestone_ids):
+    """
+    Everything the briefing needs, keyed by milestone id:
+    milestones (metadata), logged (hours) and pending (units).
+    """
+
+    milestone_ids = list(milestone_ids)
+
+    return {
+        "milestones": load_milestone_rows(milestone_ids),
+        "logged": load_logged_hours(milestone_ids),
+        "pending": load_pending_units(milestone_ids)
+    }
+
+
+# ==================================================
+# ESTIMATION TRACKING
+# ==================================================
+
+def update_predicted_completion(milestone_id, predicted_date):
+    with transaction() as c:
+        c.execute("""
+        UPDATE milestones
+        SET predicted_completion = ?
+        WHERE id = ?
+        """, (predicted_date, milestone_id))
+
+
+def update_predicted_completions(predictions):
+    """
+    predictions: iterable of (milestone_id, predicted_date).
+    """
+
+    with transaction() as c:
+        c.executemany("""
+        UPDATE milestones
+        SET predicted_completion = ?
+        WHERE id = ?
+        """, [(predicted_date, milestone_id) for milestone_id, predicted_date in predictions])
+
+
+def mark_milestone_completed(milestone_id):
+    with transaction() as c:
+        c.execute("""
+        SELECT predicted_completion
+        FROM milestones
+        WHERE id = ?
+        """, (milestone_id,))
+
+        row = c.fetchone()
+        predicted = row[0] if row else None
+
+        actual = datetime.now()
+        error_days = 0
+
+        if predicted:
+            predicted_dt = datetime.fromisoformat(predicted)
+            error_days = (actual - predicted_dt).days
+
+        c.execute("""
+        UPDATE milestones
+        SET actual_completion = ?, estimation_error_days = ?
+        WHERE id = ?
+        """, (actual.isoformat(), error_days, milestone_id))
 
 
 # ==================================================
 # DAILY CLOSE LOOP
 # ==================================================
 
+def utc_day_range(day=None):
+    """
+    Half-open [start, end) bounds for a UTC day, comparable
+    against CURRENT_TIMESTAMP columns so the timestamp indexes apply.
+    """
+
+    day = day or datetime.now(timezone.utc).date()
+    start = day.strftime("%Y-%m-%d")
+    end = (day + timedelta(days=1)).strftime("%Y-%m-%d")
+
+    return start, end
+
+
 def write_daily_summary(adaptive_capacity):
 
     today = datetime.now().strftime("%Y-%m-%d")
+    day_start, _ = utc_day_range()
 
-    conn = sqlite3.connect(DB_NAME)
-    c = conn.cursor()
+    with transaction() as c:
+        # Trigger-maintained per-day totals, one row per milestone
+        c.execute("""
+        SELECT SUM(allocated), SUM(logged)
+        FROM daily_rollup
+        WHERE date = ?
+        """, (day_start,))
+        total_allocated, total_logged = c.fetchone()
+        total_allocated = total_allocated or 0
+        total_logged = total_logged or 0
+
+        performance_ratio = (
+            total_logged / total_allocated
+            if total_allocated > 0 else 0
+        )
+
+        overload_flag = 1 if total_allocated > adaptive_capacity else 0
+
+        c.execute("""
+        INSERT INTO daily_summary
+        (date, total_allocated, total_logged, performance_ratio, overload_flag)
+        VALUES (?, ?, ?, ?, ?)
+        """, (today, total_allocated, total_logged, performance_ratio, overload_flag))
+
+        # O(1) streak update, committed with the summary row
+        advance_execution_phase(c, today, performance_ratio)
+
+
+def _window_start(days):
+    # First UTC date of a days-long window ending today
+    start, _ = utc_day_range(datetime.now(timezone.utc).date() - timedelta(days=days - 1))
+    return start
+
+
+def get_recent_performance(days=7):
+    """
+    logged / allocated per UTC day over the last `days` days, oldest
+    first, from daily_rollup. Days with nothing allocated give None.
+    """
+
+    c = get_connection().cursor()
 
     c.execute("""
-    SELECT SUM(allocated_today)
-    FROM plan_logs
-    WHERE DATE(timestamp) = DATE('now')
-    """)
-    total_allocated = c.fetchone()[0] or 0
+    SELECT date, SUM(allocated), SUM(logged)
+    FROM daily_rollup
+    WHERE date >= ?
+    GROUP BY date
+    ORDER BY date
+    """, (_window_start(days),))
+
+    return [
+        logged / allocated if allocated > 0 else None
+        for _, allocated, logged in c.fetchall()
+    ]
+
+
+def get_recent_velocity(milestone_id, days=7):
+    """
+    Average hours logged per day on a milestone over the last `days`
+    days, from daily_rollup.
+    """
+
+    c = get_connection().cursor()
 
     c.execute("""
-    SELECT SUM(hours_logged)
-    FROM logs
-    WHERE DATE(timestamp) = DATE('now')
-    """)
-    total_logged = c.fetchone()[0] or 0
+    SELECT SUM(logged)
+    FROM daily_rollup
+    WHERE milestone_id = ? AND date >= ?
+    """, (milestone_id, _window_start(days)))
 
-    performance_ratio = (
-        total_logged / total_allocated
-        if total_allocated > 0 else 0
-    )
+    return (c.fetchone()[0] or 0) / days
+
+
+# ==================================================
+# PLAN LOGS / REWARDS
+# ==================================================
 
-    overload_flag = 1 if total_allocated > adaptive_capacity else 0
+def get_last_plan_state(milestone_id):
+    c = get_connection().cursor()
 
     c.execute("""
-    INSERT INTO daily_summary
-    (date, total_allocated, total_logged, performance_ratio, overload_flag)
+    SELECT id, required_daily, forecast
+    FROM plan_logs
+    WHERE milestone_id = ?
+    ORDER BY id DESC
+    LIMIT 1
+    """, (milestone_id,))
+
+    row = c.fetchone()
+
+    if row is None:
+        return None
+
+    return {"plan_id": row[0], "required_daily": row[1], "forecast": row[2]}
+
+
+def update_plan_rewards(rewards, c=None):
+    """
+    rewards: iterable of (plan_id, reward). Runs on the caller's
+    cursor when given, else in its own transaction.
+    """
+
+    sql = "UPDATE plan_logs SET reward = ? WHERE id = ?"
+    params = [(reward, plan_id) for plan_id, reward in rewards]
+
+    if c is not None:
+        c.executemany(sql, params)
+        return
+
+    with transaction() as c:
+        c.executemany(sql, params)
+
+
+def update_plan_reward(plan_id, reward):
+    update_plan_rewards([(plan_id, reward)])
+
+
+# ==================================================
+# TD TRANSITIONS
+# ==================================================
+
+def log_transitions(transitions, c=None):
+    """
+    transitions: iterable of (milestone_id, state, action, reward,
+    next_state). Runs on the caller's cursor when given.
+    """
+
+    sql = """
+    INSERT INTO transitions (milestone_id, state, action, reward, next_state)
     VALUES (?, ?, ?, ?, ?)
-    """, (today, total_allocated, total_logged, performance_ratio, overload_flag))
+    """
+    params = [
+        (
+            milestone_id,
+            np.asarray(state, dtype=np.float64).tobytes(),
+            float(action),
+            float(reward),
+            np.asarray(next_state, dtype=np.float64).tobytes()
+        )
+        for milestone_id, state, action, reward, next_state in transitions
+    ]
 
-    conn.commit()
-    conn.close()
\ No newline at end of file
+    if c is not None:
+        c.executemany(sql, params)
+        return
+
+    with transaction() as c:
+        c.executemany(sql, params)
+
+
+def log_transition(milestone_id, state, action, reward, next_state):
+    log_transitions([(milestone_id, state, action, reward, next_state)])
+
+
+def load_transitions(after_id=0):
+    """
+    All transitions with id > after_id as column arrays:
+    ids, states (N x D), actions, rewards, next_states (N x D).
+    """
+
+    c = get_connection().cursor()
+
+    c.execute("""
+    SELECT id, state, action, reward, next_state
+    FROM transitions
+    WHERE id > ?
+    ORDER BY id
+    """, (after_id,))
+
+    rows = c.fetchall()
+
+    if not rows:
+        return None
+
+    ids, states, actions, rewards, next_states = zip(*rows)
+
+    return {
+        "ids": np.array(ids, dtype=np.int64),
+        "states": np.frombuffer(b"".join(states), dtype=np.float64).reshape(len(rows), -1),
+        "actions": np.array(actions, dtype=np.float64),
+        "rewards": np.array(rewards, dtype=np.float64),
+        "next_states": np.frombuffer(b"".join(next_states), dtype=np.float64).reshape(len(rows), -1)
+    }
+
+
+# ==================================================
+# LOGGED-HOURS BENCHMARK / MAINTENANCE CLI
+# ==================================================
+
+def _benchmark(n_logs=20_000_000, n_milestones=200, steps=4, repeats=20):
+    import os
+    import shutil
+    import tempfile
+    import time
+
+    import db_connection
+
+    tmp_dir = tempfile.mkdtemp()
+    saved_name = db_connection.DB_NAME
+    db_connection.DB_NAME = os.path.join(tmp_dir, "bench.db")
+
+    try:
+        init_db()
+        conn = get_connection()
+
+        conn.executemany("""
+        INSERT INTO milestones (goal_id, title, total_hours)
+        VALUES (1, ?, 1e9)
+        """, [(f"m{i}",) for i in range(n_milestones)])
+        conn.commit()
+
+        ids = [r[0] for r in conn.execute("SELECT id FROM milestones")]
+
+        # Bulk-load without per-row triggers, then fix the totals once
+        for event in ("insert", "update", "delete"):
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_rollup_logs_{event}")
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_logged_hours_{event}")
+
+        def timed(fn):
+            start = time.perf_counter()
+            for _ in range(repeats):
+                fn()
+            return (time.perf_counter() - start) / repeats * 1000
+
+        def summed_logged_hours():
+            # Previous load_logged_hours: SUM over each milestone's logs
+            return dict(conn.execute("""
+            SELECT milestone_id, SUM(hours_logged)
+            FROM logs
+            WHERE milestone_id IN (SELECT value FROM json_each(?))
+            GROUP BY milestone_id
+            """, (json.dumps(ids),)).fetchall())
+
+        rng = np.random.default_rng(0)
+        step = n_logs // steps
+        batch = 500_000
+
+        print(f"{n_milestones} milestones, briefing logged-hours load (ms)")
+        print(f"{'logs rows':>12} {'SUM(logs)':>12} {'running total':>14}")
+
+        for done in range(0, n_logs, step):
+            for start in range(0, step, batch):
+                size = min(batch, step - start)
+                conn.executemany(
+                    "INSERT INTO logs (milestone_id, hours_logged) VALUES (?, ?)",
+                    zip(rng.choice(ids, size).tolist(), rng.uniform(0.5, 4, size).tolist())
+                )
+                conn.commit()
+
+            rebuild_logged_hours()
+            assert not verify_logged_hours()
+
+            old_ms = timed(summed_logged_hours)
+            new_ms = timed(lambda: load_logged_hours(ids))
+
+            print(f"{done + step:>12,} {old_ms:>12.2f} {new_ms:>14.3f}")
+    finally:
+        db_connection.close_connection()
+        db_connection.DB_NAME = saved_name
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if "--benchmark" in sys.argv:
+        args = [int(a) for a in sys.argv[1:] if a.isdigit()]
+        _benchmark(*args[:1])
+    else:
+        init_db()
+
+        if "--rebuild" in sys.argv:
+            print(f"Corrected {rebuild_logged_hours()} milestone totals.")
+        else:
+            drift = verify_logged_hours()
+            for milestone_id, stored, actual in drift:
+                print(f"Milestone {milestone_id}: stored {stored}, logs {actual}")
+            print(f"{len(drift)} milestone totals out of sync.")
@@ -1,44 +1,206 @@
-from database import get_recent_performance
+from datetime import datetime
+
+from db_connection import get_connection, transaction
 
 SLIPPAGE_THRESHOLD = 0.7
 SURGE_THRESHOLD = 1.1
 COLLAPSE_STREAK_LIMIT = 3
+SURGE_STREAK_LIMIT = 2
 
 
-def compute_execution_phase():
+# ==================================================
+# PHASE STATE MACHINE
+# ==================================================
+# The phase only changes when a day is closed, so the streak counters
+# live in execution_phase_state (one row) and write_daily_summary
+# advances them in O(1). The prev_* columns hold the counters before
+# last_date, so closing the same day twice replaces that day instead
+# of counting it again.
+
+def step_streaks(streak_under, streak_over, ratio):
     """
-    Classifies current behavioral phase:
-    STABLE / SURGE / COLLAPSE
+    One day's transition of the (under, over) streak counters.
     """
 
-    performances = get_recent_performance(7)
+    if ratio is None:
+        return streak_under, streak_over
+
+    if ratio < SLIPPAGE_THRESHOLD:
+        return streak_under + 1, 0
 
-    if not performances:
-        return "STABLE"
+    if ratio > SURGE_THRESHOLD:
+        return 0, streak_over + 1
 
-    streak_under = 0
-    streak_over = 0
+    return 0, 0
 
-    for ratio in performances:
-        if ratio is None:
-            continue
 
-        if ratio < SLIPPAGE_THRESHOLD:
-            streak_under += 1
-            streak_over = 0
-        elif ratio > SURGE_THRESHOLD:
-            streak_over += 1
-            streak_under = 0
-        else:
-            streak_under = 0
-            streak_over = 0
+def classify_phase(streak_under, streak_over):
+    """
+    Classifies current behavioral phase:
+    STABLE / SURGE / COLLAPSE
+    """
 
     # ---- Collapse ----
     if streak_under >= COLLAPSE_STREAK_LIMIT:
         return "COLLAPSE"
 
     # ---- Surge ----
-    if streak_over >= 2:
+    if streak_over >= SURGE_STREAK_LIMIT:
         return "SURGE"
 
     return "STABLE"
+
+
+def _save_state(c, state):
+    c.execute("""
+    INSERT OR REPLACE INTO execution_phase_state
+    (id, phase, streak_under, streak_over, prev_streak_under, prev_streak_over,
+     last_date, updated_at)
+    VALUES (1, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        classify_phase(state["streak_under"], state["streak_over"]),
+        state["streak_under"],
+        state["streak_over"],
+        state["prev_streak_under"],
+        state["prev_streak_over"],
+        state["last_date"],
+        datetime.now().isoformat()
+    ))
+
+
+def _load_state(c):
+    c.execute("""
+    SELECT streak_under, streak_over, prev_streak_under, prev_streak_over, last_date
+    FROM execution_phase_state
+    WHERE id = 1
+    """)
+
+    row = c.fetchone()
+
+    if row is None:
+        return None
+
+    return dict(zip(
+        ("streak_under", "streak_over", "prev_streak_under", "prev_streak_over", "last_date"),
+        row
+    ))
+
+
+def advance_execution_phase(c, date, performance_ratio):
+    """
+    Folds one closed day into the stored streaks, on the caller's
+    cursor so it commits with the daily summary. Returns the phase.
+    """
+
+    state = _load_state(c)
+
+    if state is None:
+        state = _rebuild_state(c)
+
+    if state["last_date"] == date:
+        # Re-closing the same day: start again from before it
+        base = state["prev_streak_under"], state["prev_streak_over"]
+    else:
+        base = state["streak_under"], state["streak_over"]
+
+    state["streak_under"], state["streak_over"] = step_streaks(*base, performance_ratio)
+    state["prev_streak_under"], state["prev_streak_over"] = base
+    state["last_date"] = date
+
+    _save_state(c, state)
+
+    return classify_phase(state["streak_under"], state["streak_over"])
+
+
+def compute_execution_phase():
+    """
+    Current phase from the stored state; no history is read.
+    """
+
+    c = get_connection().cursor()
+
+    c.execute("SELECT phase FROM execution_phase_state WHERE id = 1")
+    row = c.fetchone()
+
+    if row is not None:
+        return row[0]
+
+    # First run on a database closed before the state table existed
+    return rebuild_execution_phase()
+
+
+# ==================================================
+# REBUILD / CONSISTENCY CHECK
+# ==================================================
+
+def _replay_summaries(c):
+    # Last summary written for each date, oldest date first
+    c.execute("""
+    SELECT date, performance_ratio
+    FROM daily_summary
+    WHERE id IN (SELECT MAX(id) FROM daily_summary GROUP BY date)
+    ORDER BY date
+    """)
+
+    state = {
+        "streak_under": 0,
+        "streak_over": 0,
+        "prev_streak_under": 0,
+        "prev_streak_over": 0,
+        "last_date": None
+    }
+
+    for date, ratio in c.fetchall():
+        base = state["streak_under"], state["streak_over"]
+        state["streak_under"], state["streak_over"] = step_streaks(*base, ratio)
+        state["prev_streak_under"], state["prev_streak_over"] = base
+        state["last_date"] = date
+
+    return state
+
+
+def _rebuild_state(c):
+    state = _replay_summaries(c)
+    _save_state(c, state)
+
+    return state
+
+
+def rebuild_execution_phase():
+    """
+    Recomputes the stored state from daily_summary and returns the
+    phase.
+    """
+
+    with transaction() as c:
+        state = _rebuild_state(c)
+
+    return classify_phase(state["streak_under"], state["streak_over"])
+
+
+def verify_execution_phase():
+    """
+    Compares the stored state with a replay of daily_summary
+    without writing. Returns (stored, rebuilt) dicts.
+    """
+
+    c = get_connection().cursor()
+
+    return _load_state(c), _replay_summaries(c)
+
+
+if __name__ == "__main__":
+    import sys
+
+    from database import init_db
+
+    init_db()
+
+    if "--rebuild" in sys.argv:
+        print(f"Rebuilt execution phase: {rebuild_execution_phase()}")
+    else:
+        stored, rebuilt = verify_execution_phase()
+        status = "consistent" if stored == rebuilt else "MISMATCH"
+        print(f"stored:  {stored}")
+        print(f"rebuilt: {rebuilt}")
+        print(f"Execution phase state {status}.")
@@ -1,57 +1,40 @@
-import sqlite3
 import pandas as pd
 
-DB_NAME = "tasks.db"
+from feature_store import FEATURE_COLUMNS, load_feature_frame
+from plan_loader import iter_plan_logs
 
 
-def load_plan_logs():
-    conn = sqlite3.connect(DB_NAME)
-    df = pd.read_sql_query("SELECT * FROM plan_logs", conn)
-    conn.close()
-    return df
+def load_plan_logs(chunksize=None):
+    """
+    Compact plan_logs (float32 columns, int8 forecast codes): one
+    DataFrame, or with chunksize an iterator of chunks.
+    """
 
+    if chunksize:
+        return iter_plan_logs(chunksize)
 
-def engineer_features():
-    df = load_plan_logs()
+    chunks = list(iter_plan_logs())
 
-    if df.empty:
-        print("No data available.")
-        return None, None
+    if not chunks:
+        return pd.DataFrame()
+
+    return pd.concat(chunks, ignore_index=True)
 
-    # Derived features
-    df["velocity_gap"] = df["required_daily"] - df["actual_velocity"]
-    df["remaining_ratio"] = df["remaining_hours"] / (
-        df["remaining_hours"] + 1
-    )  # scaled
-    df["workload_pressure"] = df["required_daily"] / 6  # relative to max day
-    df["allocation_ratio"] = df["allocated_today"] / 6
 
-    # Encode forecast label
-    label_map = {
-        "SAFE": 0,
-        "⚠ AT RISK": 1,
-        "🚨 WILL MISS DEADLINE": 2,
-        "INSUFFICIENT DATA": -1
-    }
+def engineer_features(after_id=0, until_id=None):
+    # velocity_gap, remaining_ratio, workload_pressure, allocation_ratio
+    # and forecast_label are materialized in plan_features on insert
+    df = load_feature_frame(after_id, until_id)
 
-    df["forecast_label"] = df["forecast"].map(label_map)
+    if df.empty:
+        print("No data available.")
+        return None, None
 
     # Drop rows without usable labels
     df = df[df["forecast_label"] >= 0]
 
-    feature_columns = [
-        "remaining_hours",
-        "days_remaining",
-        "required_daily",
-        "actual_velocity",
-        "velocity_gap",
-        "remaining_ratio",
-        "workload_pressure",
-        "allocation_ratio"
-    ]
-
-    X = df[feature_columns]
-    y = df["forecast_label"]
+    X = df[FEATURE_COLUMNS]
+    y = df["forecast_label"].astype(int)
 
     return X, y
 
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+
+from db_connection import get_connection
+
+# plan_features is filled by triggers on plan_logs (migration 3), so
+# every row here is already derived — readers never recompute.
+
+FEATURE_COLUMNS = [
+    "remaining_hours",
+    "days_remaining",
+    "required_daily",
+    "actual_velocity",
+    "velocity_gap",
+    "remaining_ratio",
+    "workload_pressure",
+    "allocation_ratio"
+]
+
+RAW_COLUMNS = [
+    "remaining_hours",
+    "days_remaining",
+    "required_daily",
+    "actual_velocity",
+    "allocated_today"
+]
+
+
+def _range_clause(after_id, until_id):
+    clause = "plan_log_id > ?"
+    params = [after_id]
+
+    if until_id is not None:
+        clause += " AND plan_log_id <= ?"
+        params.append(until_id)
+
+    return clause, params
+
+
+def load_features(after_id=0, until_id=None, columns=FEATURE_COLUMNS, labeled_only=True):
+    """
+    Precomputed features for plan_log ids in (after_id, until_id] as
+    ids (int64), X (float32, rows x columns) and y (int8 forecast label).
+    labeled_only drops rows whose label is missing or INSUFFICIENT DATA.
+    """
+
+    clause, params = _range_clause(after_id, until_id)
+
+    if labeled_only:
+        clause += " AND forecast_label >= 0"
+
+    c = get_connection().cursor()
+    c.execute(f"""
+    SELECT plan_log_id, forecast_label, {", ".join(columns)}
+    FROM plan_features
+    WHERE {clause}
+    ORDER BY plan_log_id
+    """, params)
+
+    rows = c.fetchall()
+
+    if not rows:
+        return (
+            np.zeros(0, dtype=np.int64),
+            np.zeros((0, len(columns)), dtype=np.float32),
+            np.zeros(0, dtype=np.int8)
+        )
+
+    data = np.array(rows, dtype=np.float64)
+
+    return (
+        data[:, 0].astype(np.int64),
+        data[:, 2:].astype(np.float32),
+        np.nan_to_num(data[:, 1], nan=-1).astype(np.int8)
+    )
+
+
+def load_feature_frame(after_id=0, until_id=None, columns=FEATURE_COLUMNS, extra=()):
+    """
+    Same rows as a DataFrame with float32 feature columns,
+    plus any `extra` stored columns (e.g. "forecast").
+    """
+
+    clause, params = _range_clause(after_id, until_id)
+    selected = ["plan_log_id AS id", "forecast_label", *columns, *extra]
+
+    df = pd.read_sql_query(f"""
+    SELECT {", ".join(selected)}
+    FROM plan_features
+    WHERE {clause}
+    ORDER BY plan_log_id
+    """, get_connection(), params=params)
+
+    return df.astype({col: np.float32 for col in columns})
@@ -0,0 +1,28 @@
+# ==================================================
+# FORECAST -> CLASS CODE
+# ==================================================
+# The one mapping from plan_logs.forecast strings to model classes,
+# shared by the plan_features trigger, plan_loader, online training
+# and the reward model. Same classes as the synthetic training data.
+# INSUFFICIENT DATA and unknown strings are unlabeled.
+
+FORECAST_LABELS = {
+    "SAFE": 0,
+    "⚠ AT RISK": 1,
+    "🚨 WILL MISS DEADLINE": 2,
+    "🚫 MATHEMATICALLY INFEASIBLE": 2,
+}
+
+FORECAST_CLASSES = ["SAFE", "⚠ AT RISK", "🚨 WILL MISS DEADLINE"]
+
+UNLABELED = -1
+
+
+def forecast_code_sql(column="forecast"):
+    """
+    SQL CASE expression mapping column to its class code (UNLABELED
+    when not in FORECAST_LABELS).
+    """
+
+    cases = " ".join(f"WHEN '{label}' THEN {code}" for label, code in FORECAST_LABELS.items())
+    return f"CASE {column} {cases} ELSE {UNLABELED} END"
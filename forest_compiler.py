@@ -0,0 +1,275 @@
+import os
+
+import numpy as np
+
+MODEL_PATH = "deadline_risk_model.pkl"
+COMPILED_PATH = "deadline_risk_model.npz"
+
+
+# ==================================================
+# COMPILED FOREST
+# ==================================================
+
+class CompiledForest:
+    """
+    A fitted RandomForestClassifier flattened into contiguous node arrays.
+    All trees are walked level by level for the whole batch at once;
+    leaves point at themselves so every row can take max_depth steps.
+    """
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes = classes
+        self.max_depth = max_depth
+
+        # children[2 * n] = left, children[2 * n + 1] = right
+        self.children = np.stack([left, right], axis=1).ravel()
+
+    # ---------------- Inference ----------------
+
+    def apply(self, X):
+        """
+        Leaf node index for every (row, tree).
+        """
+
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        flat_X = X.ravel()
+        row_offset = (np.arange(len(X)) * X.shape[1])[:, None]
+
+        node = np.broadcast_to(self.roots, (len(X), len(self.roots))).copy()
+
+        for _ in range(self.max_depth):
+            go_right = flat_X[row_offset + self.feature[node]] > self.threshold[node]
+            node = self.children[2 * node + go_right]
+
+        return node
+
+    def predict_proba(self, X):
+        leaves = self.apply(X)
+        proba = np.zeros((len(leaves), self.value.shape[1]), dtype=np.float64)
+
+        # Accumulate tree by tree, in order, as sklearn does -> identical sums
+        for t in range(leaves.shape[1]):
+            proba += self.value[leaves[:, t]]
+
+        proba /= leaves.shape[1]
+
+        return proba
+
+    def predict(self, X):
+        return self.classes[np.argmax(self.predict_proba(X), axis=1)]
+
+    # ---------------- Persistence ----------------
+
+    def save(self, path=COMPILED_PATH):
+        # Written beside `path` then renamed, so hot-reloading readers
+        # never open a half-written file
+        tmp_path = path + ".tmp"
+
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                feature=self.feature,
+                threshold=self.threshold,
+                left=self.left,
+                right=self.right,
+                value=self.value,
+                roots=self.roots,
+                classes=self.classes,
+                max_depth=np.array(self.max_depth)
+            )
+
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=COMPILED_PATH):
+        with np.load(path, allow_pickle=False) as data:
+            return cls(
+                data["feature"],
+                data["threshold"],
+                data["left"],
+                data["right"],
+                data["value"],
+                data["roots"],
+                data["classes"],
+                int(data["max_depth"])
+            )
+
+    @property
+    def nbytes(self):
+        return sum(
+            a.nbytes for a in (
+                self.feature, self.threshold, self.left,
+                self.right, self.value, self.roots
+            )
+        )
+
+
+# ==================================================
+# EXPORT
+# ==================================================
+
+def _flatten_tree(tree, max_depth):
+    """
+    Copies one sklearn tree, cutting it at max_depth (internal nodes at
+    the cut become leaves with their own class distribution) and dropping
+    the nodes that are no longer reachable.
+    """
+
+    children_left = tree.children_left
+    children_right = tree.children_right
+
+    order = []
+    depth_of = {0: 0}
+    stack = [0]
+
+    while stack:
+        n = stack.pop()
+        order.append(n)
+
+        is_leaf = children_left[n] == -1 or depth_of[n] >= max_depth
+        if not is_leaf:
+            for child in (children_right[n], children_left[n]):
+                depth_of[child] = depth_of[n] + 1
+                stack.append(child)
+
+    remap = {old: new for new, old in enumerate(order)}
+    size = len(order)
+
+    feature = np.zeros(size, dtype=np.int32)
+    threshold = np.zeros(size, dtype=np.float64)
+    left = np.arange(size, dtype=np.int32)
+    right = np.arange(size, dtype=np.int32)
+
+    values = tree.value[:, 0, :][order].astype(np.float64)
+    totals = values.sum(axis=1, keepdims=True)
+
+    # Older sklearn stores class counts and normalises in predict_proba;
+    # newer releases already store fractions and return them untouched.
+    if not np.allclose(totals, 1):
+        totals[totals == 0] = 1
+        values /= totals
+
+    for new, old in enumerate(order):
+        if children_left[old] != -1 and depth_of[old] < max_depth:
+            feature[new] = tree.feature[old]
+            threshold[new] = tree.threshold[old]
+            left[new] = remap[children_left[old]]
+            right[new] = remap[children_right[old]]
+
+    depth = max(depth_of[n] for n in order)
+
+    return feature, threshold, left, right, values, depth
+
+
+def compile_forest(model, max_depth=None, threshold_dtype=np.float64, value_dtype=np.float64):
+    """
+    Exports a fitted RandomForestClassifier.
+
+    max_depth       : prune every tree to this depth (None = keep all)
+    threshold_dtype : np.float32 halves threshold storage
+    value_dtype     : np.float32 / np.float16 shrink leaf probabilities
+
+    Defaults reproduce sklearn's predict / predict_proba exactly;
+    pruning and quantisation trade that for size.
+    """
+
+    limit = max_depth if max_depth is not None else np.iinfo(np.int32).max
+
+    parts = [_flatten_tree(est.tree_, limit) for est in model.estimators_]
+
+    sizes = np.array([len(p[0]) for p in parts])
+    offsets = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.int32)
+
+    feature = np.concatenate([p[0] for p in parts]).astype(np.int16)
+    threshold = np.concatenate([p[1] for p in parts]).astype(threshold_dtype)
+    left = np.concatenate([p[2] + off for p, off in zip(parts, offsets)]).astype(np.int32)
+    right = np.concatenate([p[3] + off for p, off in zip(parts, offsets)]).astype(np.int32)
+    value = np.concatenate([p[4] for p in parts]).astype(value_dtype)
+
+    return CompiledForest(
+        feature,
+        threshold,
+        left,
+        right,
+        value,
+        offsets,
+        np.asarray(model.classes_),
+        int(max(p[5] for p in parts))
+    )
+
+
+def compile_model_file(model_path=MODEL_PATH, out_path=COMPILED_PATH, **options):
+    from model_registry import get_model
+
+    compiled = compile_forest(get_model(model_path), **options)
+    compiled.save(out_path)
+
+    return compiled
+
+
+# ==================================================
+# BENCHMARK
+# ==================================================
+
+def _benchmark(model_path=MODEL_PATH, n_rows=5000):
+    import os
+    import tempfile
+    import time
+
+    import joblib
+    from synthetic_data import generate_synthetic_samples
+
+    model = joblib.load(model_path)
+    X = generate_synthetic_samples(n_rows).drop("forecast_label", axis=1).values
+    reference = model.predict(X)
+
+    def timed(fn, repeat=20):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) / repeat * 1000
+
+    print(f"{'variant':<22}{'1 row ms':>10}{'batch ms':>10}{'size KB':>10}{'agree':>9}")
+
+    single = X[:1]
+    print(
+        f"{'sklearn':<22}{timed(lambda: model.predict(single)):>10.3f}"
+        f"{timed(lambda: model.predict(X), 3):>10.2f}"
+        f"{os.path.getsize(model_path) / 1024:>10.0f}{1:>9.3f}"
+    )
+
+    variants = {
+        "compiled (exact)": {},
+        "float32": {"threshold_dtype": np.float32, "value_dtype": np.float32},
+        "depth 6 + float16": {"max_depth": 6, "threshold_dtype": np.float32, "value_dtype": np.float16},
+    }
+
+    for name, options in variants.items():
+        compiled = compile_forest(model, **options)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "model.npz")
+            compiled.save(path)
+            size = os.path.getsize(path) / 1024
+
+        agree = np.mean(compiled.predict(X) == reference)
+
+        print(
+            f"{name:<22}{timed(lambda: compiled.predict(single)):>10.3f}"
+            f"{timed(lambda: compiled.predict(X), 3):>10.2f}"
+            f"{size:>10.0f}{agree:>9.3f}"
+        )
+
+    exact = compile_forest(model)
+    assert np.array_equal(exact.predict_proba(X), model.predict_proba(X))
+
+
+if __name__ == "__main__":
+    _benchmark()
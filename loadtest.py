@@ -0,0 +1,119 @@
+import asyncio
+import json
+import random
+import sys
+import time
+from collections import defaultdict
+
+import numpy as np
+
+# ==================================================
+# SERVICE LOAD TEST
+# ==================================================
+# python loadtest.py [port] [clients] [requests_per_client]
+# Each client keeps one HTTP/1.1 connection open and sends a mix of
+# reads and log_work writes against a running service.py.
+
+HOST = "127.0.0.1"
+PORT = 8080
+
+MIX = [
+    ("POST", "/log_work", 0.6),
+    ("GET", "/milestones", 0.25),
+    ("GET", "/health", 0.1),
+    ("GET", "/briefing", 0.05),
+]
+
+
+async def _request(reader, writer, method, path, body=None):
+    data = json.dumps(body).encode() if body is not None else b""
+
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\n"
+        f"Host: {HOST}\r\n"
+        f"Content-Type: application/json\r\n"
+        f"Content-Length: {len(data)}\r\n"
+        f"\r\n".encode() + data
+    )
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode().partition(":")
+        if name.lower() == "content-length":
+            length = int(value)
+
+    await reader.readexactly(length)
+
+    return status
+
+
+async def _client(port, n_requests, milestone_ids, latencies, statuses, seed):
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(HOST, port)
+
+    routes = [(m, p) for m, p, _ in MIX]
+    weights = [w for _, _, w in MIX]
+
+    try:
+        for _ in range(n_requests):
+            method, path = rng.choices(routes, weights)[0]
+            body = None
+
+            if path == "/log_work":
+                body = {"milestone_id": rng.choice(milestone_ids), "hours": 0.25}
+
+            start = time.perf_counter()
+            status = await _request(reader, writer, method, path, body)
+            latencies[path].append(time.perf_counter() - start)
+            statuses[status] += 1
+    finally:
+        writer.close()
+
+
+async def run(port=PORT, clients=50, requests_per_client=200):
+    reader, writer = await asyncio.open_connection(HOST, port)
+    writer.write(f"GET /milestones HTTP/1.1\r\nHost: {HOST}\r\nConnection: close\r\n\r\n".encode())
+    raw = await reader.read()
+    writer.close()
+
+    milestones = json.loads(raw.split(b"\r\n\r\n", 1)[1])["milestones"]
+    milestone_ids = [m["id"] for m in milestones]
+
+    if not milestone_ids:
+        print("No milestones in the service database; add some first.")
+        return
+
+    latencies = defaultdict(list)
+    statuses = defaultdict(int)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[
+        _client(port, requests_per_client, milestone_ids, latencies, statuses, seed)
+        for seed in range(clients)
+    ])
+    elapsed = time.perf_counter() - start
+
+    total = sum(len(v) for v in latencies.values())
+    every = np.concatenate([np.array(v) for v in latencies.values()]) * 1000
+
+    print(f"{clients} clients x {requests_per_client} requests: "
+          f"{total} in {elapsed:.2f}s ({total / elapsed:,.0f} req/s)")
+    print(f"status codes: {dict(statuses)}")
+    print(f"{'route':<14} {'count':>7} {'p50 ms':>9} {'p99 ms':>9}")
+
+    for path, values in sorted(latencies.items()):
+        ms = np.array(values) * 1000
+        print(f"{path:<14} {len(ms):>7} {np.percentile(ms, 50):>9.2f} {np.percentile(ms, 99):>9.2f}")
+
+    print(f"{'all':<14} {total:>7} {np.percentile(every, 50):>9.2f} {np.percentile(every, 99):>9.2f}")
+
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:4]]
+    asyncio.run(run(*args))
@@ -0,0 +1,448 @@
+import atexit
+import queue
+import threading
+from datetime import datetime
+
+import numpy as np
+
+from db_connection import get_connection, transaction
+from database import (
+    insert_work_log,
+    get_last_plan_state,
+    get_recent_velocity,
+    update_plan_rewards,
+    log_transitions
+)
+from reward_model import compute_reward
+from state_embedding import compute_execution_embeddings, embedding_cache
+
+ADAPTIVE_CAPACITY = 6      # same fixed capacity as the interactive log path
+LEARN_BATCH_MAX = 512      # samples per learning transaction / TD sweep
+LEARN_FLUSH_SECONDS = 0.5  # max wait before a partial batch is learned
+
+
+# ==================================================
+# SYNCHRONOUS PART (ONE TRANSACTION)
+# ==================================================
+
+_UNSET = object()
+
+
+def record_work(c, milestone_id, hours, prev_plan=_UNSET):
+    """
+    The user-visible write, on the caller's cursor: inserts the log
+    (running totals update via trigger) and captures what learning
+    needs from before and after it. Returns (logged, remaining,
+    sample); sample is None when there is no plan to learn from.
+    Pass prev_plan when the caller already looked it up (None = no
+    plan). Raises LookupError for an unknown milestone.
+    """
+
+    c.execute("""
+    SELECT g.deadline
+    FROM milestones m
+    JOIN goals g ON g.id = m.goal_id
+    WHERE m.id = ?
+    """, (milestone_id,))
+    row = c.fetchone()
+
+    if row is None:
+        raise LookupError(f"milestone {milestone_id} does not exist")
+
+    if prev_plan is _UNSET:
+        prev_plan = get_last_plan_state(milestone_id)
+
+    prev_velocity = get_recent_velocity(milestone_id)
+
+    logged, remaining = insert_work_log(c, milestone_id, hours)
+
+    if prev_plan is None:
+        return logged, remaining, None
+
+    deadline = datetime.fromisoformat(row[0])
+
+    sample = {
+        "milestone_id": milestone_id,
+        "hours": hours,
+        "plan": prev_plan,
+        "prev_remaining": remaining + hours,
+        "remaining": remaining,
+        "days_remaining": max((deadline - datetime.now()).days, 1),
+        "prev_velocity": prev_velocity,
+        "velocity": get_recent_velocity(milestone_id)
+    }
+
+    return logged, remaining, sample
+
+
+# ==================================================
+# SINGLE-MILESTONE STATE
+# ==================================================
+
+def milestone_embedding(milestone_id, phase=None):
+    """
+    Current execution embedding of one milestone (a copy), memoized in
+    embedding_cache. The version is the trigger-maintained
+    logged_hours plus what else feeds the embedding (total, deadline,
+    today's date, phase). Returns None for an unknown milestone.
+    """
+
+    c = get_connection().cursor()
+    c.execute("""
+    SELECT m.total_hours, m.logged_hours, g.deadline
+    FROM milestones m
+    JOIN goals g ON g.id = m.goal_id
+    WHERE m.id = ?
+    """, (milestone_id,))
+    row = c.fetchone()
+
+    if row is None:
+        return None
+
+    if phase is None:
+        from execution_phase import compute_execution_phase
+        phase = compute_execution_phase()
+
+    total, logged, deadline = row
+    now = datetime.now()
+
+    def inputs():
+        remaining = max(total - logged, 0)
+        days = max((datetime.fromisoformat(deadline) - now).days, 1)
+        return (
+            remaining,
+            days,
+            remaining / days,
+            get_recent_velocity(milestone_id),
+            ADAPTIVE_CAPACITY,
+            phase
+        )
+
+    version = (logged, total, deadline, now.date(), phase)
+
+    return embedding_cache.get(milestone_id, version, inputs)
+
+
+def suggest_hours(milestone_id, max_capacity=ADAPTIVE_CAPACITY, phase=None):
+    """
+    Greedy TD allocation for one milestone today, or None if unknown.
+    """
+
+    embedding = milestone_embedding(milestone_id, phase)
+
+    if embedding is None:
+        return None
+
+    from td_learning import engine
+
+    return engine.greedy_action(embedding, max_capacity)
+
+
+# ==================================================
+# LEARNING SIDE EFFECTS (BATCHED)
+# ==================================================
+
+def build_learning_rows(samples, phase):
+    """
+    Reward, both embeddings and the TD action for each sample; the
+    embedding matrices are built in one vectorised pass each.
+    """
+
+    days = np.array([s["days_remaining"] for s in samples], dtype=np.float64)
+
+    # Over-logged milestones embed as finished, not as negative work
+    prev_remaining = np.maximum([s["prev_remaining"] for s in samples], 0.0)
+    remaining = np.maximum([s["remaining"] for s in samples], 0.0)
+
+    prev = compute_execution_embeddings(
+        prev_remaining,
+        days,
+        prev_remaining / days,
+        [s["prev_velocity"] for s in samples],
+        ADAPTIVE_CAPACITY,
+        phase
+    )
+    nxt = compute_execution_embeddings(
+        remaining,
+        days,
+        remaining / days,
+        [s["velocity"] for s in samples],
+        ADAPTIVE_CAPACITY,
+        phase
+    )
+
+    rows = []
+
+    for i, s in enumerate(samples):
+        plan = s["plan"]
+        required = plan["required_daily"] or 0
+
+        reward = compute_reward(
+            required,
+            s["remaining"] / s["days_remaining"],
+            s["hours"] / required if required > 0 else 0,
+            plan["forecast"],
+            plan["forecast"],
+            s["remaining"] <= 0
+        )
+
+        rows.append({
+            "milestone_id": s["milestone_id"],
+            "plan_id": plan["plan_id"],
+            "prev": prev[i],
+            "action": required,
+            "reward": reward,
+            "next": nxt[i]
+        })
+
+    return rows
+
+
+def write_learning_rows(c, rows):
+    """
+    Plan rewards and transitions for a batch, on the caller's cursor.
+    """
+
+    update_plan_rewards([(r["plan_id"], r["reward"]) for r in rows], c=c)
+    log_transitions(
+        [(r["milestone_id"], r["prev"], r["action"], r["reward"], r["next"]) for r in rows],
+        c=c
+    )
+
+
+def write_in_transaction(fn, *args):
+    # Default writer: fn(cursor, *args) in its own transaction
+    with transaction() as c:
+        return fn(c, *args)
+
+
+def apply_learning(samples, learn=True, write=write_in_transaction):
+    """
+    Writes plan rewards and transitions for a batch of samples through
+    write (one transaction), then runs one vectorised TD update over
+    all of them. Returns the learning rows.
+    """
+
+    if not samples:
+        return []
+
+    from execution_phase import compute_execution_phase
+
+    rows = build_learning_rows(samples, compute_execution_phase())
+
+    write(write_learning_rows, rows)
+
+    if learn:
+        from td_learning import update_q_batch
+
+        update_q_batch(
+            np.stack([r["prev"] for r in rows]),
+            [r["action"] for r in rows],
+            [r["reward"] for r in rows],
+            np.stack([r["next"] for r in rows])
+        )
+
+    return rows
+
+
+# ==================================================
+# WRITE-BEHIND PIPELINE
+# ==================================================
+
+class LogWorkPipeline:
+    """
+    log() commits the work log in one transaction and returns; the
+    learning sample goes to a background thread that applies samples
+    LEARN_BATCH_MAX at a time (or every LEARN_FLUSH_SECONDS).
+
+    write(fn, *args) commits fn(cursor, *args) for the learner; the
+    service points it at its single-writer queue.
+    """
+
+    def __init__(self, batch_max=LEARN_BATCH_MAX, flush_seconds=LEARN_FLUSH_SECONDS,
+                 write=write_in_transaction):
+        self.batch_max = batch_max
+        self.flush_seconds = flush_seconds
+        self.write = write
+        self.queue = queue.Queue()
+        self.learned = 0
+        self.errors = 0
+        self.last_error = None
+        self._worker = None
+        self._start_lock = threading.Lock()
+
+    # ---------------- Foreground ----------------
+
+    def log(self, milestone_id, hours, require_plan=False):
+        """
+        Returns (logged, remaining, queued). With require_plan, nothing
+        is written when the milestone has no plan yet (returns None).
+        """
+
+        # The learner thread writes too; record_work reads before writing
+        with transaction(immediate=True) as c:
+            prev_plan = get_last_plan_state(milestone_id)
+
+            if require_plan and prev_plan is None:
+                return None
+
+            logged, remaining, sample = record_work(c, milestone_id, hours, prev_plan)
+
+        self.enqueue(sample)
+
+        return logged, remaining, sample is not None
+
+    def enqueue(self, sample):
+        # Call only after the sample's work log has committed
+        if sample is None:
+            return
+
+        self._ensure_worker()
+        self.queue.put(sample)
+
+    def flush(self):
+        """
+        Blocks until every queued sample has been learned.
+        """
+
+        if self._worker is not None:
+            self.queue.join()
+
+    def status(self):
+        """
+        {"queued", "learned", "failed", "last_error"} for the learner.
+        """
+
+        return {
+            "queued": self.queue.qsize(),
+            "learned": self.learned,
+            "failed": self.errors,
+            "last_error": self.last_error
+        }
+
+    # ---------------- Background ----------------
+
+    def _ensure_worker(self):
+        with self._start_lock:
+            if self._worker is None:
+                self._worker = threading.Thread(
+                    target=self._run, name="log-work-learner", daemon=True
+                )
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            samples = [self.queue.get()]
+
+            try:
+                while len(samples) < self.batch_max:
+                    samples.append(self.queue.get(timeout=self.flush_seconds))
+            except queue.Empty:
+                pass
+
+            try:
+                apply_learning(samples, write=self.write)
+                self.learned += len(samples)
+            except Exception as e:
+                # The work logs are committed; only their learning is
+                # lost. Kept for status(), not printed from this thread.
+                self.errors += len(samples)
+                self.last_error = f"batch of {len(samples)}: {type(e).__name__}: {e}"
+            finally:
+                for _ in samples:
+                    self.queue.task_done()
+
+
+pipeline = LogWorkPipeline()
+
+# Learn whatever is still queued on a clean exit
+atexit.register(pipeline.flush)
+
+
+# ==================================================
+# BENCHMARK
+# ==================================================
+
+def _benchmark(n_logs=2000):
+    import os
+    import shutil
+    import tempfile
+    import time
+
+    import db_connection
+    import td_learning
+    from database import init_db, insert_goal, insert_milestone, log_work, get_logged_hours
+
+    tmp_dir = tempfile.mkdtemp()
+    saved_name = db_connection.DB_NAME
+    saved_paths = td_learning.store.snapshot_path, td_learning.store.log_path
+    db_connection.DB_NAME = os.path.join(tmp_dir, "bench.db")
+    td_learning.store.snapshot_path = os.path.join(tmp_dir, "q_table.json")
+    td_learning.store.log_path = td_learning.store.snapshot_path + ".log"
+
+    try:
+        init_db()
+
+        with transaction() as c:
+            goal_id = insert_goal(c, "bench", 30)
+            ids = [insert_milestone(c, goal_id, f"m{i}", 1e6) for i in range(50)]
+            c.executemany("""
+            INSERT INTO plan_logs
+            (milestone_id, remaining_hours, days_remaining, required_daily,
+             actual_velocity, allocated_today, forecast)
+            VALUES (?, 100, 30, 3, 2, 3, 'SAFE')
+            """, [(i,) for i in ids])
+
+        rng = np.random.default_rng(0)
+        targets = rng.choice(ids, n_logs).tolist()
+
+        def sequential(milestone_id, hours):
+            # Previous option 4: every step on its own, one commit each
+            prev_plan = get_last_plan_state(milestone_id)
+            prev_velocity = get_recent_velocity(milestone_id)
+            log_work(milestone_id, hours)
+            logged = get_logged_hours(milestone_id)
+            remaining = 1e6 - logged
+            sample = {
+                "milestone_id": milestone_id, "hours": hours, "plan": prev_plan,
+                "prev_remaining": remaining + hours, "remaining": remaining,
+                "days_remaining": 30, "prev_velocity": prev_velocity,
+                "velocity": get_recent_velocity(milestone_id)
+            }
+            row = build_learning_rows([sample], "STABLE")[0]
+            update_plan_rewards([(row["plan_id"], row["reward"])])
+            td_learning.update_q(row["prev"], row["action"], row["reward"], row["next"])
+            log_transitions([(milestone_id, row["prev"], row["action"], row["reward"], row["next"])])
+
+        start = time.perf_counter()
+        for milestone_id in targets:
+            sequential(milestone_id, 1.0)
+        sequential_ms = (time.perf_counter() - start) / n_logs * 1000
+
+        bench = LogWorkPipeline()
+        latencies = []
+        start = time.perf_counter()
+        for milestone_id in targets:
+            t = time.perf_counter()
+            bench.log(milestone_id, 1.0)
+            latencies.append(time.perf_counter() - t)
+        bench.flush()
+        drained_ms = (time.perf_counter() - start) / n_logs * 1000
+
+        latencies = np.array(latencies) * 1000
+
+        print(f"{n_logs} work logs")
+        print(f"sequential option 4      {sequential_ms:7.3f} ms/log")
+        print(f"write-behind log()       {latencies.mean():7.3f} ms/log "
+              f"(p50 {np.percentile(latencies, 50):.3f}, p99 {np.percentile(latencies, 99):.3f})")
+        print(f"write-behind incl. learn {drained_ms:7.3f} ms/log "
+              f"({bench.learned} learned, {bench.errors} failed)")
+    finally:
+        db_connection.close_connection()
+        db_connection.DB_NAME = saved_name
+        td_learning.store.snapshot_path, td_learning.store.log_path = saved_paths
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -1,22 +1,16 @@
-from datetime import datetime
+import sys
 
 from database import (
     init_db,
     add_goal,
     add_milestone,
     get_goals,
-    get_milestones,
-    log_work,
-    get_last_plan_state,
-    get_logged_hours,
-    compute_reward,
-    update_plan_reward,
-    log_transition
+    get_milestones
 )
 
-from scheduler import generate_operator_briefing, compute_execution_embedding
-from td_learning import update_q
-from online_training import retrain_model
+from scheduler import generate_operator_briefing
+from log_work_pipeline import pipeline, suggest_hours
+from online_training import retrain_model_async, retrain_status
 
 
 # --------------------------------------------------
@@ -62,6 +56,21 @@ if __name__ == "__main__":
 
     init_db()
 
+    # -------- HEADLESS BATCH MODE --------
+    # python main.py --batch commands.jsonl [batch_size]   ("-" reads stdin)
+    if len(sys.argv) > 2 and sys.argv[1] == "--batch":
+        from batch_ingest import BATCH_SIZE, ingest
+
+        batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else BATCH_SIZE
+
+        if sys.argv[2] == "-":
+            result = ingest(sys.stdin, batch_size)
+        else:
+            with open(sys.argv[2], encoding="utf-8") as f:
+                result = ingest(f, batch_size)
+
+        sys.exit(1 if result.counts["invalid"] else 0)
+
     while True:
         menu()
         choice = input("Select option: ").strip()
@@ -140,88 +149,44 @@ if __name__ == "__main__":
                 print("Invalid Milestone ID.")
                 continue
 
+            # Cached per milestone until its logged hours change
+            print(f"TD suggestion for today: {suggest_hours(milestone_id)} hrs")
+
             hours = safe_float("Hours worked: ")
             if hours <= 0:
                 print("Hours must be positive.")
                 continue
 
-            # -------- FETCH PREVIOUS PLAN STATE --------
-            prev_plan = get_last_plan_state(milestone_id)
+            # -------- LOG WORK (ONE COMMIT) --------
+            # Reward, TD update and transition logging are queued to
+            # the background learner (log_work_pipeline)
+            result = pipeline.log(milestone_id, hours, require_plan=True)
 
-            if not prev_plan:
+            if result is None:
                 print("No previous plan found. Generate briefing first.")
                 continue
 
-            milestone = next(m for m in milestones if m["id"] == milestone_id)
-
-            # -------- PREVIOUS STATE EMBEDDING --------
-            adaptive_capacity = 6  # can replace with dynamic call
-            prev_embedding = compute_execution_embedding(
-                milestone,
-                adaptive_capacity
-            )
-
-            # -------- LOG WORK --------
-            log_work(milestone_id, hours)
-
-            # -------- NEW STATE --------
-            logged = get_logged_hours(milestone_id)
-            remaining = milestone["total_hours"] - logged
-
-            deadline = datetime.fromisoformat(milestone["deadline"])
-            days_remaining = max((deadline - datetime.now()).days, 1)
-
-            new_required_daily = remaining / days_remaining
-            performance_ratio = (
-                hours / prev_plan["required_daily"]
-                if prev_plan["required_daily"] > 0 else 0
-            )
-
-            new_forecast = prev_plan["forecast"]
-            completed = remaining <= 0
-
-            # -------- COMPUTE REWARD --------
-            reward = compute_reward(
-                prev_plan["required_daily"],
-                new_required_daily,
-                performance_ratio,
-                prev_plan["forecast"],
-                new_forecast,
-                completed
-            )
-
-            # -------- UPDATE PLAN LOG --------
-            update_plan_reward(prev_plan["plan_id"], reward)
-
-            # -------- NEXT EMBEDDING --------
-            next_embedding = compute_execution_embedding(
-                milestone,
-                adaptive_capacity
-            )
-
-            # -------- TD UPDATE --------
-            update_q(
-                prev_embedding,
-                prev_plan["required_daily"],
-                reward,
-                next_embedding
-            )
-
-            # -------- LOG TRANSITION --------
-            log_transition(
-                milestone_id,
-                prev_embedding,
-                prev_plan["required_daily"],
-                reward,
-                next_embedding
-            )
+            _, remaining, _ = result
 
             print(f"Work logged.")
-            print(f"Reward: {reward}")
+            print(f"Remaining: {max(remaining, 0):.2f} hrs (learning update queued)")
+
+            learning = pipeline.status()
+            if learning["failed"]:
+                print(f"Warning: {learning['failed']} work logs not learned "
+                      f"(last: {learning['last_error']})")
 
         # -------- RETRAIN DEADLINE MODEL --------
         elif choice == "5":
-            retrain_model()
+            status = retrain_status()
+
+            if status["status"] == "failed":
+                print(f"Previous retrain failed: {status['error']}")
+
+            if retrain_model_async() is None:
+                print("Retraining already in progress.")
+            else:
+                print("Retraining in background.")
 
         # -------- EXIT --------
         elif choice == "6":
@@ -0,0 +1,467 @@
+from db_connection import get_connection, transaction
+from forecast_labels import forecast_code_sql
+
+# ==================================================
+# SCHEMA MIGRATIONS
+# ==================================================
+
+# Derived plan features (same formulas as feature_engineering used to
+# compute in pandas); shared by the triggers and the backfill.
+def _plan_features_select(label_case):
+    return f"""
+SELECT
+    plan_logs.id,
+    plan_logs.milestone_id,
+    plan_logs.remaining_hours,
+    plan_logs.days_remaining,
+    plan_logs.required_daily,
+    plan_logs.actual_velocity,
+    plan_logs.allocated_today,
+    plan_logs.required_daily - plan_logs.actual_velocity,
+    plan_logs.remaining_hours / (plan_logs.remaining_hours + 1.0),
+    plan_logs.required_daily / 6.0,
+    plan_logs.allocated_today / 6.0,
+    plan_logs.forecast,
+    {label_case}
+FROM plan_logs
+"""
+
+
+# Labels as migration 3 applied them; migration 8 switches to
+# forecast_labels.FORECAST_LABELS
+_PLAN_FEATURES_SELECT = _plan_features_select("""CASE plan_logs.forecast
+        WHEN 'SAFE' THEN 0
+        WHEN '⚠ AT RISK' THEN 1
+        WHEN '🚨 WILL MISS DEADLINE' THEN 2
+        WHEN 'INSUFFICIENT DATA' THEN -1
+    END""")
+
+
+def _plan_features_triggers(select):
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {name}
+        AFTER {event} ON plan_logs
+        BEGIN
+            INSERT OR REPLACE INTO plan_features
+            {select.replace("plan_logs.", "NEW.").replace("FROM plan_logs", "")};
+        END
+        """
+        for name, event in [
+            ("trg_plan_features_insert", "INSERT"),
+            ("trg_plan_features_update", "UPDATE OF remaining_hours, days_remaining, "
+             "required_daily, actual_velocity, allocated_today, forecast"),
+        ]
+    ]
+
+# Per-day, per-milestone totals kept in step with plan_logs and logs.
+# source table -> (total column, count column, value column)
+_ROLLUP_SOURCES = {
+    "plan_logs": ("allocated", "plan_count", "allocated_today"),
+    "logs": ("logged", "log_count", "hours_logged"),
+}
+
+
+def _rollup_upsert(ref, sign, total_col, count_col, value_col):
+    return f"""
+    INSERT INTO daily_rollup (date, milestone_id, {total_col}, {count_col})
+    VALUES (
+        COALESCE(DATE({ref}.timestamp), DATE('now')),
+        COALESCE({ref}.milestone_id, 0),
+        {sign}COALESCE({ref}.{value_col}, 0),
+        {sign}1
+    )
+    ON CONFLICT(date, milestone_id) DO UPDATE SET
+        {total_col} = {total_col} + excluded.{total_col},
+        {count_col} = {count_col} + excluded.{count_col};
+    """
+
+
+def _rollup_triggers(table, total_col, count_col, value_col):
+    add = _rollup_upsert("NEW", "", total_col, count_col, value_col)
+    remove = _rollup_upsert("OLD", "-", total_col, count_col, value_col)
+
+    return [
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_{table}_insert
+        AFTER INSERT ON {table}
+        BEGIN {add} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_{table}_update
+        AFTER UPDATE OF milestone_id, {value_col}, timestamp ON {table}
+        BEGIN {remove} {add} END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS trg_rollup_{table}_delete
+        AFTER DELETE ON {table}
+        BEGIN {remove} END
+        """,
+    ]
+
+
+def _rollup_backfill(table, total_col, count_col, value_col):
+    return f"""
+    INSERT INTO daily_rollup (date, milestone_id, {total_col}, {count_col})
+    SELECT
+        COALESCE(DATE(timestamp), DATE('now')),
+        COALESCE(milestone_id, 0),
+        SUM(COALESCE({value_col}, 0)),
+        COUNT(*)
+    FROM {table}
+    WHERE true
+    GROUP BY 1, 2
+    ON CONFLICT(date, milestone_id) DO UPDATE SET
+        {total_col} = excluded.{total_col},
+        {count_col} = excluded.{count_col}
+    """
+
+
+def _add_column(table, column, declaration):
+    # For columns init_db's CREATE TABLE already has: only databases
+    # created before that lack them, so ADD COLUMN when missing
+    def apply(c):
+        c.execute(f"PRAGMA table_info({table})")
+        if column not in {row[1] for row in c.fetchall()}:
+            c.execute(f"ALTER TABLE {table} ADD COLUMN {column} {declaration}")
+
+    return apply
+
+
+# Ordered, append-only. Never edit an applied entry —
+# add a new version instead. An entry is SQL or a callable(cursor).
+
+MIGRATIONS = [
+    (1, "indexes for hot milestone / date lookups", [
+        # get_pending_units: equality on both, ORDER BY id, covers hours
+        """
+        CREATE INDEX IF NOT EXISTS idx_execution_units_pending
+        ON execution_units (milestone_id, completed, id, estimated_hours)
+        """,
+        # get_logged_hours: SUM(hours_logged) per milestone
+        """
+        CREATE INDEX IF NOT EXISTS idx_logs_milestone
+        ON logs (milestone_id, hours_logged)
+        """,
+        # write_daily_summary: today's logged hours
+        """
+        CREATE INDEX IF NOT EXISTS idx_logs_timestamp
+        ON logs (timestamp, hours_logged)
+        """,
+        # get_last_plan_state: latest plan row per milestone
+        """
+        CREATE INDEX IF NOT EXISTS idx_plan_logs_milestone
+        ON plan_logs (milestone_id, id)
+        """,
+        # write_daily_summary: today's allocated hours
+        """
+        CREATE INDEX IF NOT EXISTS idx_plan_logs_timestamp
+        ON plan_logs (timestamp, allocated_today)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_dependencies_milestone
+        ON milestone_dependencies (milestone_id, depends_on_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_dependencies_depends_on
+        ON milestone_dependencies (depends_on_id, milestone_id)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_daily_summary_date
+        ON daily_summary (date)
+        """,
+    ]),
+
+    (2, "training high-water mark per model file", [
+        """
+        CREATE TABLE IF NOT EXISTS training_state (
+            model_path TEXT PRIMARY KEY,
+            last_plan_log_id INTEGER,
+            updated_at DATETIME
+        )
+        """,
+    ]),
+
+    (3, "plan_features store maintained by plan_logs triggers", [
+        """
+        CREATE TABLE IF NOT EXISTS plan_features (
+            plan_log_id INTEGER PRIMARY KEY,
+            milestone_id INTEGER,
+            remaining_hours REAL,
+            days_remaining REAL,
+            required_daily REAL,
+            actual_velocity REAL,
+            allocated_today REAL,
+            velocity_gap REAL,
+            remaining_ratio REAL,
+            workload_pressure REAL,
+            allocation_ratio REAL,
+            forecast TEXT,
+            forecast_label INTEGER
+        )
+        """,
+        *_plan_features_triggers(_PLAN_FEATURES_SELECT),
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_plan_features_delete
+        AFTER DELETE ON plan_logs
+        BEGIN
+            DELETE FROM plan_features WHERE plan_log_id = OLD.id;
+        END
+        """,
+        # Backfill rows logged before the triggers existed
+        "INSERT OR REPLACE INTO plan_features " + _PLAN_FEATURES_SELECT,
+    ]),
+
+    # Seeded from daily_summary on first read (execution_phase)
+    (4, "persisted execution phase streaks", [
+        """
+        CREATE TABLE IF NOT EXISTS execution_phase_state (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            phase TEXT,
+            streak_under INTEGER,
+            streak_over INTEGER,
+            prev_streak_under INTEGER,
+            prev_streak_over INTEGER,
+            last_date TEXT,
+            updated_at DATETIME
+        )
+        """,
+    ]),
+
+    (5, "daily_rollup maintained by plan_logs / logs triggers", [
+        # UTC dates, same days as utc_day_range
+        """
+        CREATE TABLE IF NOT EXISTS daily_rollup (
+            date TEXT NOT NULL,
+            milestone_id INTEGER NOT NULL,
+            allocated REAL NOT NULL DEFAULT 0,
+            logged REAL NOT NULL DEFAULT 0,
+            plan_count INTEGER NOT NULL DEFAULT 0,
+            log_count INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (date, milestone_id)
+        ) WITHOUT ROWID
+        """,
+        # get_recent_velocity: per-milestone window
+        """
+        CREATE INDEX IF NOT EXISTS idx_daily_rollup_milestone
+        ON daily_rollup (milestone_id, date, logged)
+        """,
+        *[
+            sql
+            for table, cols in _ROLLUP_SOURCES.items()
+            for sql in _rollup_triggers(table, *cols)
+        ],
+        *[_rollup_backfill(table, *cols) for table, cols in _ROLLUP_SOURCES.items()],
+    ]),
+
+    (6, "running logged / remaining hours per milestone", [
+        "ALTER TABLE milestones ADD COLUMN logged_hours REAL NOT NULL DEFAULT 0",
+        """
+        ALTER TABLE milestones ADD COLUMN remaining_hours REAL
+        GENERATED ALWAYS AS (total_hours - logged_hours) VIRTUAL
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_logged_hours_insert
+        AFTER INSERT ON logs
+        BEGIN
+            UPDATE milestones
+            SET logged_hours = logged_hours + COALESCE(NEW.hours_logged, 0)
+            WHERE id = NEW.milestone_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_logged_hours_update
+        AFTER UPDATE OF milestone_id, hours_logged ON logs
+        BEGIN
+            UPDATE milestones
+            SET logged_hours = logged_hours - COALESCE(OLD.hours_logged, 0)
+            WHERE id = OLD.milestone_id;
+            UPDATE milestones
+            SET logged_hours = logged_hours + COALESCE(NEW.hours_logged, 0)
+            WHERE id = NEW.milestone_id;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_logged_hours_delete
+        AFTER DELETE ON logs
+        BEGIN
+            UPDATE milestones
+            SET logged_hours = logged_hours - COALESCE(OLD.hours_logged, 0)
+            WHERE id = OLD.milestone_id;
+        END
+        """,
+        # Backfill from the existing history
+        """
+        UPDATE milestones
+        SET logged_hours = COALESCE((
+            SELECT SUM(hours_logged)
+            FROM logs
+            WHERE logs.milestone_id = milestones.id
+        ), 0)
+        """,
+    ]),
+
+    (7, "completion / reward columns missing from early databases", [
+        _add_column("milestones", "predicted_completion", "DATETIME"),
+        _add_column("milestones", "actual_completion", "DATETIME"),
+        _add_column("milestones", "estimation_error_days", "REAL"),
+        _add_column("plan_logs", "reward", "REAL"),
+    ]),
+
+    (8, "forecast_label from the shared forecast_labels map", [
+        "DROP TRIGGER IF EXISTS trg_plan_features_insert",
+        "DROP TRIGGER IF EXISTS trg_plan_features_update",
+        *_plan_features_triggers(_plan_features_select(forecast_code_sql("plan_logs.forecast"))),
+        f"UPDATE plan_features SET forecast_label = {forecast_code_sql()}",
+    ]),
+
+    # Older databases may already have it from init_db
+    (9, "TD transitions table", [
+        # States are float64 embeddings stored as raw bytes
+        """
+        CREATE TABLE IF NOT EXISTS transitions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            milestone_id INTEGER,
+            state BLOB,
+            action REAL,
+            reward REAL,
+            next_state BLOB,
+            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+        )
+        """,
+    ]),
+]
+
+
+def get_schema_version():
+    c = get_connection().cursor()
+
+    c.execute("""
+    CREATE TABLE IF NOT EXISTS schema_version (
+        version INTEGER PRIMARY KEY,
+        description TEXT,
+        applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+
+    c.execute("SELECT MAX(version) FROM schema_version")
+    return c.fetchone()[0] or 0
+
+
+def migrate():
+    """
+    Applies every migration newer than the stored schema version,
+    each in its own transaction. Returns the resulting version.
+    """
+
+    current = get_schema_version()
+
+    for version, description, statements in MIGRATIONS:
+        if version <= current:
+            continue
+
+        with transaction() as c:
+            for sql in statements:
+                if callable(sql):
+                    sql(c)
+                else:
+                    c.execute(sql)
+
+            c.execute("""
+            INSERT INTO schema_version (version, description)
+            VALUES (?, ?)
+            """, (version, description))
+
+        current = version
+
+    return current
+
+
+# ==================================================
+# QUERY PLAN GUARD
+# ==================================================
+# Mirrors the hot-path queries in database.py. A plan step
+# starting with SCAN means a full table (or index) walk.
+
+HOT_QUERIES = {
+    "get_pending_units": ("""
+    SELECT id, estimated_hours
+    FROM execution_units
+    WHERE milestone_id = ?
+    AND completed = 0
+    ORDER BY id ASC
+    """, (1,)),
+
+    "get_logged_hours": ("""
+    SELECT logged_hours
+    FROM milestones
+    WHERE id = ?
+    """, (1,)),
+
+    "get_last_plan_state": ("""
+    SELECT id
+    FROM plan_logs
+    WHERE milestone_id = ?
+    ORDER BY id DESC
+    LIMIT 1
+    """, (1,)),
+
+    "daily_totals": ("""
+    SELECT SUM(allocated), SUM(logged)
+    FROM daily_rollup
+    WHERE date = ?
+    """, ("2000-01-01",)),
+
+    "recent_performance": ("""
+    SELECT date, SUM(allocated), SUM(logged)
+    FROM daily_rollup
+    WHERE date >= ?
+    GROUP BY date
+    ORDER BY date
+    """, ("2000-01-01",)),
+
+    "recent_velocity": ("""
+    SELECT SUM(logged)
+    FROM daily_rollup
+    WHERE milestone_id = ? AND date >= ?
+    """, (1, "2000-01-01")),
+
+    "milestone_dependencies": ("""
+    SELECT depends_on_id
+    FROM milestone_dependencies
+    WHERE milestone_id = ?
+    """, (1,)),
+}
+
+
+def check_query_plans():
+    """
+    Raises RuntimeError listing every hot query whose plan
+    contains a full scan.
+    """
+
+    c = get_connection().cursor()
+    regressions = []
+
+    for name, (sql, params) in HOT_QUERIES.items():
+        c.execute("EXPLAIN QUERY PLAN " + sql, params)
+
+        for row in c.fetchall():
+            detail = row[-1]
+            if detail.startswith("SCAN"):
+                regressions.append(f"{name}: {detail}")
+
+    if regressions:
+        raise RuntimeError(
+            "Query plan regression:\n" + "\n".join(regressions)
+        )
+
+
+if __name__ == "__main__":
+    from database import init_db
+
+    init_db()
+    print(f"Schema version: {get_schema_version()}")
+
+    check_query_plans()
+    print("All hot queries use an index.")
@@ -0,0 +1,79 @@
+from collections import defaultdict
+
+from db_connection import get_connection
+
+# ==================================================
+# MILESTONE DEPENDENCY GRAPH
+# ==================================================
+# milestone_dependencies rows read: milestone_id depends on
+# depends_on_id. A milestone counts as done once it has an
+# actual_completion.
+
+
+def _load_graph():
+    c = get_connection().cursor()
+
+    c.execute("SELECT milestone_id, depends_on_id FROM milestone_dependencies")
+    edges = c.fetchall()
+
+    c.execute("SELECT id FROM milestones WHERE actual_completion IS NOT NULL")
+    completed = {r[0] for r in c.fetchall()}
+
+    return edges, completed
+
+
+def filter_unlocked_milestones(milestones):
+    """
+    Drops milestones that still wait on an unfinished dependency.
+    """
+
+    edges, completed = _load_graph()
+
+    blocked = {
+        milestone_id
+        for milestone_id, depends_on_id in edges
+        if depends_on_id not in completed
+    }
+
+    return [m for m in milestones if m["id"] not in blocked]
+
+
+def compute_criticality():
+    """
+    milestone id -> share of open milestones that transitively wait on
+    it (0..1). Milestones nothing depends on are omitted (0).
+    """
+
+    edges, completed = _load_graph()
+
+    dependents = defaultdict(set)
+    for milestone_id, depends_on_id in edges:
+        if milestone_id not in completed:
+            dependents[depends_on_id].add(milestone_id)
+
+    if not dependents:
+        return {}
+
+    open_ids = set(dependents) | {m for ds in dependents.values() for m in ds}
+    open_ids -= completed
+
+    criticality = {}
+
+    for root in dependents:
+        if root in completed:
+            continue
+
+        seen = set()
+        stack = list(dependents[root])
+
+        while stack:
+            node = stack.pop()
+            if node in seen:
+                continue
+            seen.add(node)
+            stack.extend(dependents.get(node, ()))
+
+        seen.discard(root)
+        criticality[root] = len(seen) / len(open_ids)
+
+    return criticality
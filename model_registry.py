@@ -0,0 +1,91 @@
+import os
+import tempfile
+import threading
+
+import joblib
+
+MODEL_PATH = "deadline_risk_model.pkl"
+
+
+# ==================================================
+# LAZY, HOT-RELOADING MODEL REGISTRY
+# ==================================================
+
+class ModelRegistry:
+    """
+    Loads a joblib model (numpy payloads memory-mapped) or a compiled
+    .npz forest on first use, and reloads it whenever the file on disk
+    is replaced.
+    """
+
+    def __init__(self, path=MODEL_PATH, mmap_mode="r"):
+        self.path = path
+        self.mmap_mode = mmap_mode
+        self._model = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _file_version(self):
+        st = os.stat(self.path)
+        # os.replace gives a new inode, so a swapped-in file always differs
+        return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+    def _load(self):
+        if self.path.endswith(".npz"):
+            from forest_compiler import CompiledForest
+            return CompiledForest.load(self.path)
+
+        return joblib.load(self.path, mmap_mode=self.mmap_mode)
+
+    def get(self):
+        version = self._file_version()
+
+        if version == self._version:
+            return self._model
+
+        with self._lock:
+            if version != self._version:
+                model = self._load()
+                # single reference assignment -> readers see old or new, never half
+                self._model, self._version = model, version
+
+        return self._model
+
+    def predict(self, X):
+        return self.get().predict(X)
+
+    @property
+    def version(self):
+        return self._version
+
+
+def save_model(model, path=MODEL_PATH):
+    """
+    Dumps to a temp file beside `path`, then atomically renames it
+    into place so readers never load a half-written model.
+    """
+
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+
+    try:
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+_registries = {}
+
+
+def get_registry(path=MODEL_PATH):
+    if path not in _registries:
+        _registries[path] = ModelRegistry(path)
+    return _registries[path]
+
+
+def get_model(path=MODEL_PATH):
+    return get_registry(path).get()
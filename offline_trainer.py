@@ -0,0 +1,243 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from database import init_db, load_transitions
+
+ITERATIONS = 50                             # fitted-Q iterations per run
+RIDGE_GRID = [1e-3, 1e-2, 1e-1, 1, 10]      # linear model sweep
+N_BOOTSTRAP = 8                             # bagged runs per model
+VALIDATION_FRACTION = 0.2
+
+
+# ==================================================
+# LINEAR FITTED Q ITERATION (reinforcement_allocator)
+# ==================================================
+
+def _linear_features(states, actions):
+    actions = np.asarray(actions, dtype=np.float64)[:, None]
+    return np.hstack([states, actions, actions ** 2])
+
+
+def _linear_max_q(states, w, action_space):
+    action_features = np.stack([action_space, action_space ** 2], axis=1)
+    d = states.shape[1]
+    return (states @ w[:d])[:, None] + (action_features @ w[d:])[None, :]
+
+
+def fit_linear(batch, gamma, ridge, iterations=ITERATIONS, seed=None, action_space=None):
+    """
+    Fitted Q iteration with a ridge-regression regressor:
+    w <- argmin ||Φw - (r + γ max_a' Φ(s',a')w)||² + ridge·||w||².
+    seed != None fits on a bootstrap resample.
+    """
+
+    states, actions, rewards, next_states = batch
+
+    if seed is not None:
+        idx = np.random.default_rng(seed).integers(0, len(rewards), len(rewards))
+        states, actions, rewards, next_states = (
+            states[idx], actions[idx], rewards[idx], next_states[idx]
+        )
+
+    phi = _linear_features(states, actions)
+    gram = phi.T @ phi + ridge * np.eye(phi.shape[1])
+
+    w = np.zeros(phi.shape[1])
+
+    for _ in range(iterations):
+        target = rewards + gamma * _linear_max_q(next_states, w, action_space).max(axis=1)
+        w = np.linalg.solve(gram, phi.T @ target)
+
+    return w
+
+
+def linear_bellman_error(batch, w, gamma, action_space):
+    states, actions, rewards, next_states = batch
+
+    q = _linear_features(states, actions) @ w
+    target = rewards + gamma * _linear_max_q(next_states, w, action_space).max(axis=1)
+
+    return float(np.mean((target - q) ** 2))
+
+
+def _linear_sweep_job(args):
+    train, valid, gamma, ridge, action_space = args
+    w = fit_linear(train, gamma, ridge, action_space=action_space)
+    return ridge, linear_bellman_error(valid, w, gamma, action_space)
+
+
+def _linear_bootstrap_job(args):
+    batch, gamma, ridge, seed, action_space = args
+    return fit_linear(batch, gamma, ridge, seed=seed, action_space=action_space)
+
+
+# ==================================================
+# TABULAR FITTED Q ITERATION (td_learning)
+# ==================================================
+
+def fit_tabular(prev_rows, action_idx, rewards, next_rows, n_rows, n_actions,
+                gamma, iterations=ITERATIONS, seed=None):
+    """
+    Each iteration sets every visited (s, a) cell to the mean of its
+    targets r + γ max_a' Q(s', a'). Returns (values, visited_mask).
+    """
+
+    if seed is not None:
+        idx = np.random.default_rng(seed).integers(0, len(rewards), len(rewards))
+        prev_rows, action_idx, rewards, next_rows = (
+            prev_rows[idx], action_idx[idx], rewards[idx], next_rows[idx]
+        )
+
+    cells = prev_rows * n_actions + action_idx
+    counts = np.bincount(cells, minlength=n_rows * n_actions)
+    visited = counts > 0
+
+    values = np.zeros(n_rows * n_actions)
+
+    for _ in range(iterations):
+        q = values.reshape(n_rows, n_actions)
+        target = rewards + gamma * q[next_rows].max(axis=1)
+        sums = np.bincount(cells, weights=target, minlength=n_rows * n_actions)
+        values = np.where(visited, sums / np.maximum(counts, 1), values)
+
+    return values.reshape(n_rows, n_actions), visited.reshape(n_rows, n_actions)
+
+
+def _tabular_bootstrap_job(args):
+    return fit_tabular(*args)
+
+
+# ==================================================
+# DRIVERS
+# ==================================================
+
+def _load_batch():
+    data = load_transitions()
+
+    if data is None:
+        return None
+
+    return (
+        data["states"],
+        data["actions"],
+        data["rewards"],
+        data["next_states"]
+    )
+
+
+def train_linear(gamma=None, ridge_grid=RIDGE_GRID, n_bootstrap=N_BOOTSTRAP, max_workers=None):
+    """
+    Picks the ridge penalty by held-out Bellman error, then bags
+    n_bootstrap fits in parallel, saves the averaged weights to
+    td_function_model.pkl and loads them into reinforcement_allocator.
+    """
+
+    import reinforcement_allocator as ra
+
+    gamma = ra.GAMMA if gamma is None else gamma
+    action_space = ra.ACTIONS
+
+    batch = _load_batch()
+    if batch is None:
+        print("No transitions logged yet.")
+        return None
+
+    n = len(batch[2])
+    order = np.random.default_rng(0).permutation(n)
+    cut = int(n * (1 - VALIDATION_FRACTION))
+    train = tuple(a[order[:cut]] for a in batch)
+    valid = tuple(a[order[cut:]] for a in batch)
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        scores = list(pool.map(
+            _linear_sweep_job,
+            [(train, valid, gamma, ridge, action_space) for ridge in ridge_grid]
+        ))
+
+        best_ridge = min(scores, key=lambda s: s[1])[0]
+
+        runs = list(pool.map(
+            _linear_bootstrap_job,
+            [(batch, gamma, best_ridge, seed, action_space) for seed in range(n_bootstrap)]
+        ))
+
+    weights = np.mean(runs, axis=0)
+    ra.save_model(weights)
+
+    # Into the live array too: otherwise the next checkpoint (or the
+    # atexit save) writes the stale weights back over this file
+    ra.weights[:] = weights
+    ra.updates_since_checkpoint = 0
+
+    for ridge, error in scores:
+        print(f"ridge={ridge:<8g} validation bellman mse={error:.4f}")
+    print(f"Linear model: ridge={best_ridge}, {n_bootstrap} bootstrap runs, {n} transitions.")
+
+    return weights
+
+
+def train_tabular(gamma=None, n_bootstrap=N_BOOTSTRAP, max_workers=None):
+    """
+    Bags n_bootstrap tabular fits in parallel, averages each cell over
+    the runs that visited it, writes q_table.json via QStore and loads
+    it into the live td_learning engine.
+    """
+
+    import td_learning as td
+
+    gamma = td.GAMMA if gamma is None else gamma
+
+    batch = _load_batch()
+    if batch is None:
+        print("No transitions logged yet.")
+        return None
+
+    states, actions, rewards, next_states = batch
+    n_actions = len(td.ACTIONS)
+
+    prev_codes = td.encoder.encode_batch(states)
+    next_codes = td.encoder.encode_batch(next_states)
+
+    codes, inverse = np.unique(np.concatenate([prev_codes, next_codes]), return_inverse=True)
+    prev_rows, next_rows = inverse[:len(rewards)], inverse[len(rewards):]
+
+    action_idx = np.abs(
+        actions[:, None] - np.asarray(td.ACTIONS, dtype=np.float64)[None, :]
+    ).argmin(axis=1)
+
+    args = [
+        (prev_rows, action_idx, rewards, next_rows, len(codes), n_actions, gamma, ITERATIONS, seed)
+        for seed in range(n_bootstrap)
+    ]
+
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        runs = list(pool.map(_tabular_bootstrap_job, args))
+
+    total = sum(values * visited for values, visited in runs)
+    hits = sum(visited.astype(np.int64) for _, visited in runs)
+    values = total / np.maximum(hits, 1)
+
+    labels = [str(a) for a in td.ACTIONS]
+    q_table = {
+        str(int(code)): dict(zip(labels, values[r].tolist()))
+        for r, code in enumerate(codes)
+        if hits[r].any()
+    }
+
+    td.store.compact(q_table)
+
+    # Reload in place (td.q_table aliases it): otherwise the next
+    # update_q compacts the stale in-memory table over this snapshot
+    td.engine.q_table.clear()
+    td.engine.q_table.load_dict(q_table, td.encoder)
+
+    print(f"Tabular model: {len(q_table)} states, {n_bootstrap} bootstrap runs, {len(rewards)} transitions.")
+
+    return q_table
+
+
+if __name__ == "__main__":
+    init_db()
+    train_linear()
+    train_tabular()
@@ -1,59 +1,221 @@
-import sqlite3
-import pandas as pd
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 import joblib
 from sklearn.ensemble import RandomForestClassifier
 from datetime import datetime
 
-DB_NAME = "tasks.db"
+from db_connection import get_connection, transaction
+from model_registry import save_model
+from feature_store import RAW_COLUMNS, load_feature_frame
+
 MODEL_PATH = "deadline_risk_model.pkl"
 
+FEATURES = RAW_COLUMNS
 
-def fetch_training_data():
-    conn = sqlite3.connect(DB_NAME)
+MIN_ROWS = 50           # rows needed for a full fit
+MIN_NEW_ROWS = 50       # new rows needed to grow the forest
+TREES_PER_ROUND = 20    # trees added per incremental round
+MAX_TREES = 200         # oldest trees retired beyond this
 
-    df = pd.read_sql_query("""
-    SELECT
-        remaining_hours,
-        days_remaining,
-        required_daily,
-        actual_velocity,
-        allocated_today,
-        forecast
-    FROM plan_logs
-    WHERE forecast IS NOT NULL
-    """, conn)
 
-    conn.close()
+def fetch_training_data(after_id=0):
+    # Same precomputed rows and forecast_label codes as feature_engineering
+    df = load_feature_frame(after_id, columns=RAW_COLUMNS)
 
-    return df
+    return df[df["forecast_label"] >= 0].astype({"forecast_label": np.int8})
 
 
-def retrain_model():
-    df = fetch_training_data()
+# ==================================================
+# HIGH-WATER MARK
+# ==================================================
 
-    if len(df) < 50:
-        print("Not enough real data to retrain.")
-        return
+def get_high_water_mark():
+    c = get_connection().cursor()
+
+    c.execute("""
+    SELECT last_plan_log_id
+    FROM training_state
+    WHERE model_path = ?
+    """, (MODEL_PATH,))
+
+    row = c.fetchone()
+    return row[0] if row else 0
+
+
+def write_high_water_mark(c, plan_log_id):
+    # On the caller's cursor (e.g. the service's single writer)
+    c.execute("""
+    INSERT INTO training_state (model_path, last_plan_log_id, updated_at)
+    VALUES (?, ?, ?)
+    ON CONFLICT(model_path) DO UPDATE SET
+        last_plan_log_id = excluded.last_plan_log_id,
+        updated_at = excluded.updated_at
+    """, (MODEL_PATH, int(plan_log_id), datetime.now().isoformat()))
+
+
+def set_high_water_mark(plan_log_id):
+    with transaction() as c:
+        write_high_water_mark(c, plan_log_id)
+
+
+# ==================================================
+# RETRAINING
+# ==================================================
+
+def _load_current_model():
+    if not os.path.exists(MODEL_PATH):
+        return None
+
+    model = joblib.load(MODEL_PATH)
+
+    # The shipped synthetic model uses a different feature set
+    if getattr(model, "n_features_in_", None) != len(FEATURES):
+        return None
 
-    X = df[[
-        "remaining_hours",
-        "days_remaining",
-        "required_daily",
-        "actual_velocity",
-        "allocated_today"
-    ]]
+    return model
 
-    y = df["forecast"]
 
+def _full_fit(df):
     model = RandomForestClassifier(
-        n_estimators=200,
+        n_estimators=MAX_TREES,
         max_depth=8,
         random_state=42
     )
 
-    model.fit(X, y)
+    model.fit(df[FEATURES], df["forecast_label"])
+
+    return model
+
+
+def _grow(model, df, seed):
+    """
+    Fits TREES_PER_ROUND new trees on the new rows only and appends
+    them, retiring the oldest trees beyond MAX_TREES. Returns None if
+    the new rows don't carry exactly the model's classes (their trees
+    would not line up with the existing ones).
+    """
+
+    new_trees = RandomForestClassifier(
+        n_estimators=TREES_PER_ROUND,
+        max_depth=8,
+        random_state=seed
+    )
+
+    new_trees.fit(df[FEATURES], df["forecast_label"])
+
+    if not np.array_equal(new_trees.classes_, model.classes_):
+        return None
+
+    model.estimators_ = (model.estimators_ + new_trees.estimators_)[-MAX_TREES:]
+    model.n_estimators = len(model.estimators_)
+
+    return model
+
+
+def retrain_model(save_mark=True):
+    """
+    Grows or refits the model and saves it. Returns the new high-water
+    mark (None if nothing was trained); save_mark=False leaves storing
+    it to the caller, so a worker process never writes to SQLite.
+    """
+
+    last_id = get_high_water_mark()
+    model = _load_current_model() if last_id else None
+
+    if model is not None:
+        df = fetch_training_data(after_id=last_id)
 
-    joblib.dump(model, MODEL_PATH)
+        if len(df) < MIN_NEW_ROWS:
+            print("Not enough new data to retrain.")
+            return None
 
+        grown = _grow(model, df, seed=int(df["id"].iloc[-1]))
+
+        if grown is not None:
+            save_model(grown, MODEL_PATH)
+            print(f"Model updated: +{TREES_PER_ROUND} trees on {len(df)} new rows "
+                  f"({grown.n_estimators} total).")
+            return _finish(df, save_mark)
+
+    # No compatible model (or class set changed) -> fit from scratch
+    df = fetch_training_data()
+
+    if len(df) < MIN_ROWS:
+        print("Not enough real data to retrain.")
+        return None
+
+    save_model(_full_fit(df), MODEL_PATH)
     print("Model retrained and updated.")
+
+    return _finish(df, save_mark)
+
+
+def _finish(df, save_mark):
+    mark = int(df["id"].iloc[-1])
+
+    if save_mark:
+        set_high_water_mark(mark)
+
+    return mark
+
+
+# ==================================================
+# BACKGROUND WORKER
+# ==================================================
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="retrain")
+_pending = None
+_pending_lock = threading.Lock()
+
+
+def retrain_model_async():
+    """
+    Queues retrain_model on a single background worker and returns at
+    once. The model file is swapped atomically when it finishes, and the
+    scheduler's registry picks it up on its next access. Returns None
+    when a retrain is already running.
+    """
+
+    global _pending
+
+    with _pending_lock:
+        if _pending is not None and not _pending.done():
+            return None
+
+        _pending = _executor.submit(retrain_model)
+        _pending.add_done_callback(_report_failure)
+        return _pending
+
+
+def _report_failure(future):
+    # Otherwise a failed background retrain is only visible via retrain_status
+    error = future.exception()
+
+    if error is not None:
+        print(f"\nBackground retrain failed: {type(error).__name__}: {error}")
+
+
+def retrain_status():
+    """
+    Outcome of the latest retrain_model_async: {"status": "idle" |
+    "running" | "failed" | "done"}, with "error" when failed (same
+    shape as the service's GET /retrain).
+    """
+
+    with _pending_lock:
+        future = _pending
+
+    if future is None:
+        return {"status": "idle"}
+
+    if not future.done():
+        return {"status": "running"}
+
+    error = future.exception()
+    if error is not None:
+        return {"status": "failed", "error": f"{type(error).__name__}: {error}"}
+
+    return {"status": "done"}
@@ -0,0 +1,168 @@
+import numpy as np
+import pandas as pd
+
+from db_connection import get_connection
+from forecast_labels import FORECAST_CLASSES, FORECAST_LABELS, forecast_code_sql
+
+# ==================================================
+# COMPACT STREAMING LOADER FOR plan_logs
+# ==================================================
+# Forecast strings become int8 class codes (forecast_labels) inside
+# the query, so no Python str objects are created per row; numeric
+# columns are float32.
+
+NUMERIC_COLUMNS = [
+    "remaining_hours",
+    "days_remaining",
+    "required_daily",
+    "actual_velocity",
+    "allocated_today"
+]
+
+CHUNKSIZE = 100_000
+
+_FORECAST_CODE = forecast_code_sql() + " AS forecast_code"
+
+
+def _query(columns, after_id):
+    return f"""
+    SELECT id, milestone_id, {", ".join(columns)}, {_FORECAST_CODE}
+    FROM plan_logs
+    WHERE id > {int(after_id)}
+    ORDER BY id
+    """
+
+
+def iter_plan_logs(chunksize=CHUNKSIZE, columns=NUMERIC_COLUMNS, after_id=0):
+    """
+    Yields DataFrames of at most chunksize rows: id (int64),
+    milestone_id (int32), float32 columns and forecast_code (int8,
+    -1 = missing/unknown).
+    """
+
+    dtypes = {"id": "int64", "milestone_id": "Int32", "forecast_code": "int8"}
+    dtypes.update({col: "float32" for col in columns})
+
+    yield from pd.read_sql_query(
+        _query(columns, after_id),
+        get_connection(),
+        chunksize=chunksize,
+        dtype=dtypes
+    )
+
+
+def load_plan_matrix(columns=NUMERIC_COLUMNS, after_id=0, chunksize=CHUNKSIZE):
+    """
+    Fills one preallocated float32 (rows x columns) matrix chunk by
+    chunk. Returns (ids, X, forecast_codes).
+    """
+
+    conn = get_connection()
+    n = conn.execute(
+        "SELECT COUNT(*) FROM plan_logs WHERE id > ?", (after_id,)
+    ).fetchone()[0]
+
+    ids = np.empty(n, dtype=np.int64)
+    X = np.empty((n, len(columns)), dtype=np.float32)
+    codes = np.empty(n, dtype=np.int8)
+
+    filled = 0
+
+    for chunk in iter_plan_logs(chunksize, columns, after_id):
+        end = min(filled + len(chunk), n)
+        take = end - filled
+
+        ids[filled:end] = chunk["id"].to_numpy()[:take]
+        X[filled:end] = chunk[columns].to_numpy(dtype=np.float32)[:take]
+        codes[filled:end] = chunk["forecast_code"].to_numpy()[:take]
+
+        filled = end
+        if filled == n:
+            break
+
+    # Rows inserted after the COUNT are left for the next call
+    return ids[:filled], X[:filled], codes[:filled]
+
+
+def decode_forecast(codes):
+    """
+    int8 codes -> pandas Categorical of the class labels (-1 -> NaN).
+    """
+
+    return pd.Categorical.from_codes(np.asarray(codes, dtype=np.int8), FORECAST_CLASSES)
+
+
+# ==================================================
+# PEAK MEMORY BENCHMARK
+# ==================================================
+
+def _benchmark(n_rows=10_000_000):
+    import os
+    import shutil
+    import tempfile
+    import time
+    import tracemalloc
+
+    import db_connection
+    from database import init_db
+
+    tmp_dir = tempfile.mkdtemp()
+    saved_name = db_connection.DB_NAME
+    db_connection.DB_NAME = os.path.join(tmp_dir, "bench.db")
+
+    try:
+        init_db()
+        conn = get_connection()
+
+        # Bulk-load without firing the plan_features trigger per row
+        conn.execute("DROP TRIGGER IF EXISTS trg_plan_features_insert")
+
+        rng = np.random.default_rng(0)
+        batch = 500_000
+
+        for start in range(0, n_rows, batch):
+            size = min(batch, n_rows - start)
+            values = rng.uniform(0, 100, (size, 5)).tolist()
+            labels = rng.choice(list(FORECAST_LABELS), size).tolist()
+            conn.executemany("""
+            INSERT INTO plan_logs
+            (milestone_id, remaining_hours, days_remaining, required_daily,
+             actual_velocity, allocated_today, forecast)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """, [(i % 1000, *v, f) for i, (v, f) in enumerate(zip(values, labels))])
+            conn.commit()
+
+        def measure(label, fn):
+            tracemalloc.start()
+            start = time.perf_counter()
+            result = fn()
+            elapsed = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{label:<32} peak {peak / 1024 ** 2:9.1f} MB  {elapsed:7.1f}s")
+            return result
+
+        print(f"{n_rows:,} plan_logs rows")
+
+        measure(
+            "read_sql_query (current path)",
+            lambda: pd.read_sql_query("SELECT * FROM plan_logs", conn)
+        )
+        measure(
+            "iter_plan_logs (chunked)",
+            lambda: sum(len(chunk) for chunk in iter_plan_logs())
+        )
+        measure(
+            "load_plan_matrix (preallocated)",
+            lambda: load_plan_matrix()
+        )
+    finally:
+        db_connection.close_connection()
+        db_connection.DB_NAME = saved_name
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    import sys
+
+    _benchmark(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000)
@@ -0,0 +1,200 @@
+import heapq
+import math
+
+
+# ==================================================
+# PRIORITY SCHEDULING ENGINE
+# ==================================================
+
+class PriorityScheduler:
+    """
+    Packs pending execution units into today's capacity,
+    highest-priority milestone first.
+
+    greedy   : heap over milestones, first-fit over each milestone's
+               units in id order. O(n log n).
+    knapsack : exact bounded knapsack maximising sum(priority * hours),
+               with hours discretised to `resolution`. Used only while
+               capacity / resolution <= max_slots, else falls back to greedy.
+    """
+
+    def __init__(self, capacity, mode="greedy", resolution=0.1, max_slots=2000):
+        self.capacity = capacity
+        self.mode = mode
+        self.resolution = resolution
+        self.max_slots = max_slots
+        self._heap = []
+
+    def add(self, milestone_id, priority, units):
+        """
+        units: list of {"id", "hours"} dicts, in execution order.
+        """
+
+        if units:
+            # min-heap -> negate priority; milestone_id breaks ties stably
+            self._heap.append((-priority, milestone_id, units))
+
+    def schedule(self):
+        # round first: 0.3 / 0.1 == 2.9999999999999996 would truncate to 2;
+        # floor so slots never exceed capacity
+        slots = math.floor(round(self.capacity / self.resolution, 6))
+
+        if self.mode == "knapsack" and slots <= self.max_slots:
+            return self._schedule_knapsack(slots)
+
+        return self._schedule_greedy()
+
+    # ---------------- Greedy ----------------
+
+    def _schedule_greedy(self):
+        heap = list(self._heap)
+        heapq.heapify(heap)
+
+        min_unit = min(
+            (u["hours"] for _, _, units in heap for u in units),
+            default=0
+        )
+
+        plan = []
+        hours_left = self.capacity
+
+        while heap and hours_left >= min_unit and hours_left > 0:
+            _, milestone_id, units = heapq.heappop(heap)
+
+            for unit in units:
+                if hours_left <= 0:
+                    break
+
+                if unit["hours"] <= hours_left:
+                    plan.append((milestone_id, unit["id"], unit["hours"]))
+                    hours_left -= unit["hours"]
+
+        return plan
+
+    # ---------------- Exact bounded knapsack ----------------
+
+    def _schedule_knapsack(self, slots):
+
+        # Bucket every unit by discretised weight
+        by_weight = {}
+
+        for neg_priority, milestone_id, units in self._heap:
+            for unit in units:
+                weight = max(1, math.ceil(unit["hours"] / self.resolution - 1e-9))
+                by_weight.setdefault(weight, []).append(
+                    (-neg_priority * unit["hours"], -neg_priority, -unit["id"], milestone_id, unit)
+                )
+
+        # At most slots // weight units of one weight fit, and swapping a
+        # packed unit for a same-weight one of higher value (priority *
+        # hours, as in the DP) stays feasible, so keeping the top
+        # slots // weight by value per weight loses nothing.
+        groups = {}
+
+        for weight, candidates in by_weight.items():
+            for _, priority, _, milestone_id, unit in heapq.nlargest(slots // weight, candidates):
+                key = (milestone_id, unit["hours"])
+                groups.setdefault(key, (priority, weight, []))[2].append(unit)
+
+        # Binary splitting: k identical units -> O(log k) 0/1 items
+        items = []
+
+        for key, (priority, weight, group) in groups.items():
+            group.sort(key=lambda u: u["id"])
+            value = priority * key[1]
+
+            remaining, size = len(group), 1
+            while remaining > 0:
+                take = min(size, remaining)
+                items.append((weight * take, value * take, take, key))
+                remaining -= take
+                size *= 2
+
+        best = [0.0] * (slots + 1)
+        keep = []
+
+        for weight, value, _, _ in items:
+            chosen = bytearray(slots + 1)
+
+            for cap in range(slots, weight - 1, -1):
+                candidate = best[cap - weight] + value
+                if candidate > best[cap]:
+                    best[cap] = candidate
+                    chosen[cap] = 1
+
+            keep.append(chosen)
+
+        # Walk back to recover how many units of each group were taken
+        taken = {}
+        cap = slots
+
+        for index in range(len(items) - 1, -1, -1):
+            if keep[index][cap]:
+                weight, _, count, key = items[index]
+                taken[key] = taken.get(key, 0) + count
+                cap -= weight
+
+        plan = []
+
+        for key, (_, _, group) in sorted(groups.items(), key=lambda g: -g[1][0]):
+            for unit in group[:taken.get(key, 0)]:
+                plan.append((key[0], unit["id"], unit["hours"]))
+
+        return plan
+
+
+# ==================================================
+# BENCHMARK
+# ==================================================
+
+def _first_fit(milestones, capacity):
+    plan = []
+    hours_left = capacity
+
+    for milestone_id, _, units in milestones:
+        for unit in units:
+            if hours_left <= 0:
+                break
+
+            if unit["hours"] <= hours_left:
+                plan.append((milestone_id, unit["id"], unit["hours"]))
+                hours_left -= unit["hours"]
+
+    return plan
+
+
+def _benchmark(n_milestones=5000, units_per_milestone=10, capacity=6):
+    import random
+    import time
+
+    random.seed(42)
+    unit_id = 0
+    milestones = []
+
+    for milestone_id in range(n_milestones):
+        units = []
+        for _ in range(units_per_milestone):
+            unit_id += 1
+            units.append({"id": unit_id, "hours": random.choice([0.5, 1, 1.5, 2.4, 4])})
+        milestones.append((milestone_id, random.uniform(0, 10), units))
+
+    priority = {m: p for m, p, _ in milestones}
+
+    def value(plan):
+        return sum(priority[m] * hours for m, _, hours in plan)
+
+    start = time.perf_counter()
+    baseline = _first_fit(milestones, capacity)
+    print(f"first-fit loop   {time.perf_counter() - start:8.4f}s  value={value(baseline):.2f}")
+
+    for mode in ["greedy", "knapsack"]:
+        start = time.perf_counter()
+        engine = PriorityScheduler(capacity, mode=mode)
+        for milestone_id, p, units in milestones:
+            engine.add(milestone_id, p, units)
+        plan = engine.schedule()
+        print(f"{mode:<16} {time.perf_counter() - start:8.4f}s  value={value(plan):.2f}")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,120 @@
+import json
+import os
+
+COMPACT_EVERY = 1000  # appended cells between snapshots
+
+
+# ==================================================
+# APPEND-ONLY Q-TABLE STORE
+# ==================================================
+
+class QStore:
+    """
+    Persists a {state_key: {action: q}} table as a JSON snapshot plus an
+    append-only log of changed cells ([state_key, action, q] per line).
+
+    Each update appends one line -> O(1). Every COMPACT_EVERY appends the
+    full table is written to a temp file and atomically renamed over the
+    snapshot, then the log is truncated. Replaying a cell is idempotent,
+    so a crash between rename and truncate loses nothing, and a torn last
+    log line is simply skipped.
+    """
+
+    def __init__(self, snapshot_path, actions, compact_every=COMPACT_EVERY, fsync=False):
+        self.snapshot_path = snapshot_path
+        self.log_path = snapshot_path + ".log"
+        self.actions = [str(a) for a in actions]
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._log = None
+        self._pending = 0
+
+    def empty_row(self):
+        return {a: 0 for a in self.actions}
+
+    # ---------------- Load ----------------
+
+    def load(self):
+        q_table = {}
+
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, "r") as f:
+                q_table = json.load(f)
+
+        if os.path.exists(self.log_path):
+            with open(self.log_path, "r") as f:
+                for line in f:
+                    try:
+                        state_key, action, value = json.loads(line)
+                    except ValueError:
+                        continue  # torn write from a crash
+
+                    q_table.setdefault(state_key, self.empty_row())[action] = value
+                    self._pending += 1
+
+        return q_table
+
+    # ---------------- Write ----------------
+
+    def record(self, state_key, action, value, q_table=None):
+        """
+        Appends one changed cell. Pass q_table to allow periodic compaction.
+        """
+
+        if self._log is None:
+            self._log = open(self.log_path, "a")
+
+        self._log.write(json.dumps([state_key, str(action), value]) + "\n")
+        self._log.flush()
+
+        if self.fsync:
+            os.fsync(self._log.fileno())
+
+        self._pending += 1
+
+        if q_table is not None and self._pending >= self.compact_every:
+            self.compact(q_table)
+
+    def record_many(self, cells, q_table=None):
+        """
+        Appends a batch of (state_key, action, value) cells with a
+        single flush; compaction as in record().
+        """
+
+        if self._log is None:
+            self._log = open(self.log_path, "a")
+
+        n = 0
+        for state_key, action, value in cells:
+            self._log.write(json.dumps([state_key, str(action), value]) + "\n")
+            n += 1
+
+        self._log.flush()
+
+        if self.fsync:
+            os.fsync(self._log.fileno())
+
+        self._pending += n
+
+        if q_table is not None and self._pending >= self.compact_every:
+            self.compact(q_table)
+
+    def compact(self, q_table):
+        if hasattr(q_table, "to_dict"):
+            q_table = q_table.to_dict()
+
+        tmp_path = self.snapshot_path + ".tmp"
+
+        with open(tmp_path, "w") as f:
+            json.dump(q_table, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_path, self.snapshot_path)
+
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+        open(self.log_path, "w").close()
+        self._pending = 0
@@ -2,6 +2,9 @@ import numpy as np
 import pickle
 import os
 import random
+import atexit
+
+from replay_buffer import PrioritizedReplayBuffer
 
 # ==================================================
 # CONFIG
@@ -15,6 +18,12 @@ EPSILON = 0.15    # exploration rate
 
 ACTION_SPACE = [0.5, 1, 2, 3, 4, 5]  # possible hour allocations
 
+STATE_DIM = 14
+BUFFER_CAPACITY = 10000   # transitions kept for replay
+BATCH_SIZE = 32           # minibatch per learning step
+PRIORITY_BETA = 0.4       # importance-sampling correction
+CHECKPOINT_EVERY = 50     # updates between weight saves
+
 
 # ==================================================
 # MODEL LOAD / INIT
@@ -35,6 +44,17 @@ def save_model(weights):
 
 
 weights = load_model()
+replay = PrioritizedReplayBuffer(BUFFER_CAPACITY, STATE_DIM)
+updates_since_checkpoint = 0
+
+
+def _save_pending_updates():
+    # Don't lose the updates since the last checkpoint on a clean exit
+    if updates_since_checkpoint:
+        save_model(weights)
+
+
+atexit.register(_save_pending_updates)
 
 
 # ==================================================
@@ -51,6 +71,11 @@ def build_features(embedding, action):
     return np.concatenate([embedding, action_vector])
 
 
+# Action part of φ(s,a) for every action, computed once
+ACTIONS = np.array(ACTION_SPACE, dtype=np.float64)
+ACTION_FEATURES = np.stack([ACTIONS, ACTIONS ** 2], axis=1)
+
+
 # ==================================================
 # Q VALUE
 # ==================================================
@@ -60,6 +85,30 @@ def q_value(embedding, action):
     return np.dot(weights, features)
 
 
+def q_values(embedding):
+    """
+    Q(s, a) for every action: one state dot product plus the action
+    part. No shared buffer, so safe from any thread.
+    """
+
+    state_q = np.dot(np.asarray(embedding, dtype=np.float64), weights[:STATE_DIM])
+    return state_q + ACTION_FEATURES @ weights[STATE_DIM:]
+
+
+def q_values_batch(embeddings):
+    """
+    (N x actions) Q-values for N embeddings:
+    state part and action part of the linear model, one matmul each.
+    """
+
+    embeddings = np.asarray(embeddings, dtype=np.float64)
+
+    return (
+        (embeddings @ weights[:STATE_DIM])[:, None]
+        + (ACTION_FEATURES @ weights[STATE_DIM:])[None, :]
+    )
+
+
 # ==================================================
 # POLICY
 # ==================================================
@@ -70,19 +119,38 @@ def choose_allocation(embedding, max_capacity):
     if random.random() < EPSILON:
         return random.choice(ACTION_SPACE)
 
-    # exploit
-    q_values = []
-
-    for a in ACTION_SPACE:
-        if a <= max_capacity:
-            q_values.append((a, q_value(embedding, a)))
+    # exploit over feasible actions only
+    feasible = ACTIONS <= max_capacity
 
-    if not q_values:
+    if not feasible.any():
         return None
 
-    best_action = max(q_values, key=lambda x: x[1])[0]
+    scores = np.where(feasible, q_values(embedding), -np.inf)
+
+    return ACTION_SPACE[int(np.argmax(scores))]
+
+
+def choose_allocations(embeddings, max_capacity):
+    """
+    Batched ε-greedy choice for many milestone embeddings at once.
+    Rows with no feasible action get NaN.
+    """
+
+    embeddings = np.asarray(embeddings, dtype=np.float64)
+    n = len(embeddings)
+
+    feasible = ACTIONS <= max_capacity
+
+    if not feasible.any():
+        return np.full(n, np.nan)
 
-    return best_action
+    scores = np.where(feasible[None, :], q_values_batch(embeddings), -np.inf)
+    chosen = ACTIONS[np.argmax(scores, axis=1)]
+
+    explore = np.random.random(n) < EPSILON
+    chosen[explore] = np.random.choice(ACTIONS, size=int(explore.sum()))
+
+    return chosen
 
 
 # ==================================================
@@ -90,27 +158,104 @@ def choose_allocation(embedding, max_capacity):
 # ==================================================
 
 def td_update(prev_embedding, action, reward, next_embedding):
+    """
+    Stores the transition, then takes one minibatch gradient step
+    on a prioritized sample from the replay buffer.
+    """
+
+    global updates_since_checkpoint
+
+    replay.add(prev_embedding, action, reward, next_embedding)
+
+    td_errors = learn_from_replay()
+
+    updates_since_checkpoint += 1
+    if updates_since_checkpoint >= CHECKPOINT_EVERY:
+        save_model(weights)
+        updates_since_checkpoint = 0
+
+    return td_errors
+
+
+def learn_from_replay(batch_size=BATCH_SIZE):
 
     global weights
 
-    prev_features = build_features(prev_embedding, action)
+    idx, states, actions, rewards, next_states, is_weights = replay.sample(
+        batch_size,
+        PRIORITY_BETA
+    )
+
+    # (batch x features) matrix of φ(s,a)
+    actions = actions.astype(np.float64)
+    features = np.hstack([states, actions[:, None], actions[:, None] ** 2])
 
     # Current Q
-    current_q = np.dot(weights, prev_features)
+    current_q = features @ weights
 
     # Next max Q
-    next_q_values = [
-        q_value(next_embedding, a) for a in ACTION_SPACE
-    ]
-
-    max_next_q = max(next_q_values) if next_q_values else 0
+    max_next_q = q_values_batch(next_states).max(axis=1)
 
     # TD target
-    target = reward + GAMMA * max_next_q
+    target = rewards + GAMMA * max_next_q
 
     td_error = target - current_q
 
-    # Gradient update
-    weights += ALPHA * td_error * prev_features
+    # Importance-weighted mean gradient
+    weights += ALPHA * (is_weights * td_error) @ features / len(idx)
+
+    replay.update_priorities(idx, td_error)
+
+    return td_error
+
+
+# ==================================================
+# BENCHMARK
+# ==================================================
+
+def _choose_allocation_loop(embedding, max_capacity):
+    # Previous per-action implementation, kept for comparison
+    q_values = []
+
+    for a in ACTION_SPACE:
+        if a <= max_capacity:
+            q_values.append((a, q_value(embedding, a)))
+
+    if not q_values:
+        return None
+
+    return max(q_values, key=lambda x: x[1])[0]
+
+
+def _benchmark(n_decisions=20000, batch=5000):
+    import time
+
+    global EPSILON
+
+    saved_epsilon, EPSILON = EPSILON, 0
+    embeddings = np.random.rand(n_decisions, STATE_DIM)
+
+    start = time.perf_counter()
+    loop = [_choose_allocation_loop(e, 4) for e in embeddings]
+    loop_us = (time.perf_counter() - start) / n_decisions * 1e6
+
+    start = time.perf_counter()
+    single = [choose_allocation(e, 4) for e in embeddings]
+    single_us = (time.perf_counter() - start) / n_decisions * 1e6
+
+    start = time.perf_counter()
+    batched = choose_allocations(embeddings[:batch], 4)
+    batch_us = (time.perf_counter() - start) / batch * 1e6
+
+    EPSILON = saved_epsilon
+
+    assert loop == single
+    assert np.array_equal(np.array(loop[:batch]), batched)
+
+    print(f"per-action loop   {loop_us:8.2f} us/decision")
+    print(f"single matmul     {single_us:8.2f} us/decision")
+    print(f"batched ({batch})  {batch_us:8.2f} us/decision")
+
 
-    save_model(weights)
+if __name__ == "__main__":
+    _benchmark()
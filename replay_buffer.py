@@ -0,0 +1,78 @@
+import numpy as np
+
+
+# ==================================================
+# PRIORITIZED RING-BUFFER EXPERIENCE REPLAY
+# ==================================================
+
+class PrioritizedReplayBuffer:
+    """
+    Fixed-size circular buffer of (state, action, reward, next_state)
+    held in preallocated NumPy arrays. Once full, the oldest transition
+    is overwritten.
+
+    Sampling is proportional to priority ** alpha, with importance-
+    sampling weights (N * P(i)) ** -beta normalised to max 1.
+    """
+
+    def __init__(self, capacity, state_dim, alpha=0.6, eps=1e-3, seed=None):
+        self.capacity = capacity
+        self.alpha = alpha
+        self.eps = eps
+        self.rng = np.random.default_rng(seed)
+
+        self.states = np.zeros((capacity, state_dim), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.float32)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_dim), dtype=np.float32)
+        self.priorities = np.zeros(capacity, dtype=np.float64)
+        self.max_priority = 1.0   # running max, so add() is O(1)
+
+        self.position = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def add(self, state, action, reward, next_state):
+        i = self.position
+
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+
+        # New transitions get the max priority seen so far so they are seen soon
+        self.priorities[i] = self.max_priority
+
+        self.position = (i + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def sample(self, batch_size, beta=0.4):
+        """
+        Returns (indices, states, actions, rewards, next_states, weights).
+        """
+
+        scaled = self.priorities[:self.size] ** self.alpha
+        probs = scaled / scaled.sum()
+
+        idx = self.rng.choice(self.size, size=min(batch_size, self.size), p=probs)
+
+        weights = (self.size * probs[idx]) ** -beta
+        weights /= weights.max()
+
+        return (
+            idx,
+            self.states[idx],
+            self.actions[idx],
+            self.rewards[idx],
+            self.next_states[idx],
+            weights
+        )
+
+    def update_priorities(self, idx, td_errors):
+        priorities = np.abs(np.asarray(td_errors, dtype=np.float64)) + self.eps
+        self.priorities[idx] = priorities
+
+        if priorities.size:
+            self.max_priority = max(self.max_priority, float(priorities.max()))
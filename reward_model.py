@@ -1,3 +1,6 @@
+from forecast_labels import FORECAST_LABELS
+
+
 def compute_reward(
     prev_required_daily,
     new_required_daily,
@@ -21,15 +24,8 @@ def compute_reward(
         reward -= 2
 
     # ---- Forecast Movement ----
-    forecast_map = {
-        "SAFE": 0,
-        "⚠ AT RISK": 1,
-        "🚨 WILL MISS DEADLINE": 2,
-        "🚫 MATHEMATICALLY INFEASIBLE": 2
-    }
-
-    if prev_forecast in forecast_map and new_forecast in forecast_map:
-        delta = forecast_map[prev_forecast] - forecast_map[new_forecast]
+    if prev_forecast in FORECAST_LABELS and new_forecast in FORECAST_LABELS:
+        delta = FORECAST_LABELS[prev_forecast] - FORECAST_LABELS[new_forecast]
         reward += delta * 3
 
     # ---- Completion ----
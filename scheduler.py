@@ -1,85 +1,110 @@
-import joblib
 from datetime import datetime, timedelta
 
 from database import (
-    get_logged_hours,
-    generate_execution_units,
-    get_pending_units,
-    update_predicted_completion
+    generate_execution_units_bulk,
+    load_briefing_snapshot,
+    load_pending_units,
+    update_predicted_completions
 )
 
 from milestone_graph import compute_criticality, filter_unlocked_milestones
 from execution_phase import compute_execution_phase
+from priority_scheduler import PriorityScheduler
+from model_registry import get_registry
 
 
 MODEL_PATH = "deadline_risk_model.pkl"
 BASE_CAPACITY = 6
 MIN_CAPACITY = 2
 MAX_CAPACITY = 10
+SCHEDULING_MODE = "greedy"  # or "knapsack" for exact packing
 
-model = joblib.load(MODEL_PATH)
+# Loaded on first prediction, reloaded when retraining replaces the file
+model = get_registry(MODEL_PATH)
 
 
 def compute_adaptive_capacity():
     return BASE_CAPACITY, False, 0
 
 
-def generate_operator_briefing(milestones):
+def _silent(*args, **kwargs):
+    pass
+
+
+def generate_operator_briefing(milestones, verbose=True):
+
+    # verbose=False: return the plan only (service callers)
+    out = print if verbose else _silent
 
     today = datetime.now()
     adaptive_capacity, _, _ = compute_adaptive_capacity()
     phase = compute_execution_phase()
 
-    print("\n===== OPERATOR BRIEFING =====\n")
-    print(f"Adaptive Capacity: {adaptive_capacity} hrs")
-    print(f"Execution Phase: {phase}\n")
+    out("\n===== OPERATOR BRIEFING =====\n")
+    out(f"Adaptive Capacity: {adaptive_capacity} hrs")
+    out(f"Execution Phase: {phase}\n")
 
     milestones = filter_unlocked_milestones(milestones)
     criticality_map = compute_criticality()
 
-    plan = []
-    hours_left = adaptive_capacity
+    engine = PriorityScheduler(adaptive_capacity, mode=SCHEDULING_MODE)
+
+    # ---- Load logged hours + pending units for all milestones at once ----
+    snapshot = load_briefing_snapshot(m["id"] for m in milestones)
+    logged_map = snapshot["logged"]
+    pending_map = snapshot["pending"]
+
+    candidates = []
 
     for m in milestones:
 
-        logged = get_logged_hours(m["id"])
+        logged = logged_map.get(m["id"], 0)
         remaining = m["total_hours"] - logged
 
         if remaining <= 0:
             continue
 
-        pending_units = get_pending_units(m["id"])
+        candidates.append((m, remaining))
+
+    # ---- Chunk every milestone without units in one transaction ----
+    missing = [(m["id"], remaining) for m, remaining in candidates if not pending_map.get(m["id"])]
 
-        if not pending_units:
-            generate_execution_units(
-                m["id"],
-                remaining,
-                adaptive_capacity,
-                phase
-            )
-            pending_units = get_pending_units(m["id"])
+    if missing:
+        generate_execution_units_bulk(missing, adaptive_capacity, phase)
+        pending_map.update(load_pending_units(mid for mid, _ in missing))
+
+    predictions = []
+
+    for m, remaining in candidates:
+
+        pending_units = pending_map.get(m["id"], [])
 
         required_daily = remaining / 5
         predicted_days = remaining / max(required_daily, 0.01)
         predicted_completion = today + timedelta(days=predicted_days)
-        update_predicted_completion(m["id"], predicted_completion.isoformat())
+        predictions.append((m["id"], predicted_completion.isoformat()))
 
         criticality = criticality_map.get(m["id"], 0)
         priority_score = required_daily * (1 + criticality)
 
-        for unit in pending_units:
-            if hours_left <= 0:
-                break
+        engine.add(m["id"], priority_score, pending_units)
 
-            if unit["hours"] <= hours_left:
-                plan.append((m["id"], unit["id"], unit["hours"]))
-                hours_left -= unit["hours"]
+    update_predicted_completions(predictions)
+    plan = engine.schedule()
 
-    print("===== TODAY'S EXECUTION PLAN =====\n")
+    out("===== TODAY'S EXECUTION PLAN =====\n")
 
     for milestone_id, unit_id, hours in plan:
-        print(f"- Milestone {milestone_id} | Unit {unit_id} → {hours} hrs")
+        out(f"- Milestone {milestone_id} | Unit {unit_id} → {hours} hrs")
+
+    if verbose and candidates:
+        from log_work_pipeline import suggest_hours
+
+        out("\n===== TD SUGGESTED HOURS =====\n")
+
+        for m, _ in candidates:
+            out(f"- Milestone {m['id']} → {suggest_hours(m['id'], adaptive_capacity, phase)} hrs")
 
-    print("\n===================================\n")
+    out("\n===================================\n")
 
     return plan
\ No newline at end of file
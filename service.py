@@ -0,0 +1,489 @@
+import asyncio
+import json
+import multiprocessing
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from db_connection import get_connection
+from database import init_db, get_milestones
+from log_work_pipeline import (
+    pipeline,
+    record_work,
+    write_in_transaction,
+    milestone_embedding,
+    ADAPTIVE_CAPACITY
+)
+
+HOST = "127.0.0.1"
+PORT = 8080
+
+READ_POOL_SIZE = 4        # threads, one pooled SQLite connection each
+WRITE_BATCH_MAX = 256     # jobs committed together by the writer
+MAX_BODY = 1 << 20        # bytes
+
+REASONS = {
+    200: "OK",
+    202: "Accepted",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+# ==================================================
+# SINGLE-WRITER QUEUE
+# ==================================================
+# Every SQLite write goes through one task and one thread (so one
+# connection and no lock contention). Jobs waiting in the queue while
+# a batch runs are committed together in the next one; each job runs
+# in its own SAVEPOINT so a failing job doesn't undo its neighbours.
+
+class DatabaseWriter:
+
+    def __init__(self, batch_max=WRITE_BATCH_MAX):
+        self.batch_max = batch_max
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-writer")
+        self.task = None
+        self.commits = 0
+        self.jobs = 0
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            await asyncio.gather(self.task, return_exceptions=True)
+        self.executor.shutdown(wait=True)
+
+    async def submit(self, fn, *args, exclusive=False):
+        """
+        fn(cursor, *args) runs inside the shared batch transaction.
+        exclusive=True runs fn(*args) on its own, for callers that
+        manage their own transactions (e.g. the briefing).
+        """
+
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((fn, args, exclusive, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+
+        while True:
+            jobs = [await self.queue.get()]
+
+            while len(jobs) < self.batch_max and not self.queue.empty():
+                jobs.append(self.queue.get_nowait())
+
+            results = await loop.run_in_executor(self.executor, self._apply, jobs)
+
+            for (_, _, _, future), (ok, value) in zip(jobs, results):
+                if future.done():
+                    continue
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+    def _apply(self, jobs):
+        # Runs on the writer thread
+        results = []
+        batch = []
+
+        for job in jobs:
+            if job[2]:
+                results.extend(self._commit(batch))
+                batch = []
+                results.append(self._call(job[0], job[1]))
+            else:
+                batch.append(job)
+
+        results.extend(self._commit(batch))
+
+        return results
+
+    def _commit(self, batch):
+        if not batch:
+            return []
+
+        conn = get_connection()
+        c = conn.cursor()
+        results = []
+
+        # Write lock up front: jobs read before they write
+        c.execute("BEGIN IMMEDIATE")
+
+        try:
+            for fn, args, _, _ in batch:
+                c.execute("SAVEPOINT job")
+                try:
+                    results.append((True, fn(c, *args)))
+                    c.execute("RELEASE job")
+                except Exception as e:
+                    c.execute("ROLLBACK TO job")
+                    c.execute("RELEASE job")
+                    results.append((False, e))
+
+            conn.commit()
+        except BaseException as e:
+            conn.rollback()
+            return [(False, e)] * len(batch)
+        finally:
+            c.close()
+
+        self.commits += 1
+        self.jobs += len(batch)
+
+        return results
+
+    @staticmethod
+    def _call(fn, args):
+        try:
+            return True, fn(*args)
+        except Exception as e:
+            return False, e
+
+
+# ==================================================
+# OPERATIONS
+# ==================================================
+# Plain functions so they run on the read pool, the writer thread
+# or a worker process.
+
+def _log_work(c, milestone_id, hours):
+    try:
+        logged, remaining, sample = record_work(c, milestone_id, hours)
+    except LookupError as e:
+        raise HTTPError(404, str(e))
+
+    return {"milestone_id": milestone_id, "logged_hours": logged, "remaining_hours": remaining}, sample
+
+
+def _milestone_state(milestone_id):
+    from td_learning import engine
+
+    embedding = milestone_embedding(milestone_id)
+
+    if embedding is None:
+        raise HTTPError(404, f"milestone {milestone_id} does not exist")
+
+    return {
+        "milestone_id": milestone_id,
+        "embedding": embedding.tolist(),
+        "suggested_hours": engine.greedy_action(embedding, ADAPTIVE_CAPACITY)
+    }
+
+
+def _briefing():
+    from scheduler import generate_operator_briefing
+
+    milestones = get_milestones()
+    plan = generate_operator_briefing(milestones, verbose=False) if milestones else []
+
+    return {
+        "plan": [
+            {"milestone_id": m, "unit_id": u, "hours": h}
+            for m, u, h in plan
+        ]
+    }
+
+
+def _predict(features):
+    from scheduler import model
+
+    X = np.asarray(features, dtype=np.float64)
+    if X.ndim == 1:
+        X = X[None, :]
+
+    return {"predictions": np.asarray(model.predict(X)).tolist()}
+
+
+def _retrain():
+    # Runs in a spawned worker process (see EngineService.trainer): it
+    # only reads SQLite; the new high-water mark goes back to the parent
+    from online_training import retrain_model
+
+    start = time.perf_counter()
+    mark = retrain_model(save_mark=False)
+
+    return {"seconds": round(time.perf_counter() - start, 2), "high_water_mark": mark}
+
+
+# ==================================================
+# SERVICE
+# ==================================================
+
+class EngineService:
+
+    def __init__(self, read_pool_size=READ_POOL_SIZE, batch_max=WRITE_BATCH_MAX):
+        self.writer = DatabaseWriter(batch_max)
+        self.readers = ThreadPoolExecutor(read_pool_size, thread_name_prefix="db-reader")
+        self.cpu = ThreadPoolExecutor(2, thread_name_prefix="cpu")
+        # spawn, not fork: a forked child would inherit the pooled SQLite
+        # connections in db_connection._local (and held locks/threads)
+        self.trainer = ProcessPoolExecutor(
+            max_workers=1, mp_context=multiprocessing.get_context("spawn")
+        )
+        self.retraining = None
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/milestones"): self.milestones,
+            ("GET", "/briefing"): self.briefing,
+            ("GET", "/milestone_state"): self.milestone_state,
+            ("POST", "/log_work"): self.log_work,
+            ("POST", "/predict"): self.predict,
+            ("POST", "/retrain"): self.retrain,
+            ("GET", "/retrain"): self.retrain_status,
+        }
+
+    async def _read(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.readers, fn, *args)
+
+    # ---------------- Handlers ----------------
+
+    async def health(self, query, body):
+        return 200, {
+            "status": "ok",
+            "write_commits": self.writer.commits,
+            "write_jobs": self.writer.jobs,
+            "write_queue": self.writer.queue.qsize(),
+            "learning": pipeline.status()
+        }
+
+    async def milestones(self, query, body):
+        return 200, {"milestones": await self._read(get_milestones)}
+
+    async def milestone_state(self, query, body):
+        try:
+            milestone_id = int(query.get("milestone_id", ""))
+        except ValueError:
+            raise HTTPError(400, "milestone_id must be an integer")
+
+        # Read pool; repeat lookups are cache hits until the next log
+        return 200, await self._read(_milestone_state, milestone_id)
+
+    async def briefing(self, query, body):
+        # Writes execution units / predictions -> serialized with other writes
+        return 200, await self.writer.submit(_briefing, exclusive=True)
+
+    async def log_work(self, query, body):
+        milestone_id = body.get("milestone_id")
+        hours = body.get("hours")
+
+        if not isinstance(milestone_id, int) or isinstance(milestone_id, bool):
+            raise HTTPError(400, "milestone_id must be an integer")
+        if not isinstance(hours, (int, float)) or isinstance(hours, bool) or hours <= 0:
+            raise HTTPError(400, "hours must be a positive number")
+
+        result, sample = await self.writer.submit(_log_work, milestone_id, hours)
+
+        # Committed -> learning (reward, transition, TD) goes write-behind
+        pipeline.enqueue(sample)
+
+        return 200, {**result, "learning_queued": sample is not None}
+
+    async def predict(self, query, body):
+        features = body.get("features")
+
+        if not isinstance(features, list) or not features:
+            raise HTTPError(400, "features must be a non-empty list")
+
+        loop = asyncio.get_running_loop()
+        try:
+            return 200, await loop.run_in_executor(self.cpu, _predict, features)
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+
+    async def retrain(self, query, body):
+        if self.retraining is not None and not self.retraining.done():
+            return 409, {"status": "running"}
+
+        self.retraining = asyncio.create_task(self._run_retrain())
+
+        return 202, {"status": "started"}
+
+    async def _run_retrain(self):
+        from online_training import write_high_water_mark
+
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self.trainer, _retrain)
+
+        if result["high_water_mark"] is not None:
+            await self.writer.submit(write_high_water_mark, result["high_water_mark"])
+
+        return result
+
+    async def retrain_status(self, query, body):
+        if self.retraining is None:
+            return 200, {"status": "idle"}
+
+        if not self.retraining.done():
+            return 200, {"status": "running"}
+
+        error = self.retraining.exception()
+        if error is not None:
+            return 200, {"status": "failed", "error": str(error)}
+
+        return 200, {"status": "done", **self.retraining.result()}
+
+    # ---------------- HTTP/1.1 ----------------
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    # Malformed framing: the rest of the stream can't be trusted
+                    await self._respond(writer, e.status, {"error": str(e)}, False)
+                    break
+
+                if request is None:
+                    break
+
+                method, path, query, body, keep_alive = request
+                status, payload = await self._dispatch(method, path, query, body)
+
+                await self._respond(writer, status, payload, keep_alive)
+
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive):
+        data = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n".encode() + data
+        )
+        await writer.drain()
+
+    async def _read_request(self, reader):
+        line = await reader.readline()
+        if not line:
+            return None
+
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            return None
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HTTPError(400, "invalid Content-Length")
+
+        if length < 0:
+            raise HTTPError(400, "invalid Content-Length")
+        raw = await reader.readexactly(min(length, MAX_BODY)) if length else b""
+
+        url = urlsplit(target)
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+
+        connection = headers.get("connection", "").lower()
+        keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+
+        # An unread oversized body would corrupt the next request
+        keep_alive = keep_alive and length <= MAX_BODY
+
+        return method, url.path, query, (raw, length), keep_alive
+
+    async def _dispatch(self, method, path, query, body):
+        handler = self.routes.get((method, path))
+
+        if handler is None:
+            if any(p == path for _, p in self.routes):
+                return 405, {"error": f"{method} not allowed on {path}"}
+            return 404, {"error": f"no route {path}"}
+
+        raw, length = body
+
+        try:
+            if length > MAX_BODY:
+                raise HTTPError(413, "request body too large")
+
+            try:
+                parsed = json.loads(raw) if raw else {}
+            except ValueError:
+                raise HTTPError(400, "body must be JSON")
+
+            if not isinstance(parsed, dict):
+                raise HTTPError(400, "body must be a JSON object")
+
+            return await handler(query, parsed)
+        except HTTPError as e:
+            return e.status, {"error": str(e)}
+        except Exception as e:
+            return 500, {"error": f"{type(e).__name__}: {e}"}
+
+    # ---------------- Lifecycle ----------------
+
+    def _write_from_thread(self, loop):
+        # For the learner thread: its reward / transition writes join
+        # the single-writer queue; only the TD update stays on its thread
+        def write(fn, *args):
+            return asyncio.run_coroutine_threadsafe(self.writer.submit(fn, *args), loop).result()
+
+        return write
+
+    async def serve(self, host=HOST, port=PORT):
+        loop = asyncio.get_running_loop()
+
+        self.writer.start()
+        pipeline.write = self._write_from_thread(loop)
+        server = await asyncio.start_server(self.handle, host, port)
+
+        print(f"Serving on http://{host}:{port}")
+
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            # Drain learning while the writer still runs
+            await loop.run_in_executor(None, pipeline.flush)
+            pipeline.write = write_in_transaction
+            await self.writer.stop()
+            self.readers.shutdown(wait=False)
+            self.cpu.shutdown(wait=False)
+            self.trainer.shutdown(wait=False)
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else PORT
+
+    init_db()
+
+    try:
+        asyncio.run(EngineService().serve(port=port))
+    except KeyboardInterrupt:
+        pass
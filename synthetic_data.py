@@ -1,67 +1,130 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 import pandas as pd
 
 
 DAILY_WORK_HOURS = 6
 
+COLUMNS = [
+    "remaining_hours",
+    "days_remaining",
+    "required_daily",
+    "actual_velocity",
+    "velocity_gap",
+    "remaining_ratio",
+    "workload_pressure",
+    "allocation_ratio",
+    "forecast_label"
+]
+
+
+def generate_synthetic_arrays(n, rng):
+    """
+    One vectorised draw of n samples -> {column: array}.
+    """
+
+    remaining_hours = rng.uniform(5, 300, n)
+    days_remaining = rng.uniform(5, 180, n)
+
+    required_daily = remaining_hours / days_remaining
+
+    # simulate velocity variability
+    velocity_noise = rng.uniform(0.2, 1.5, n)
+    actual_velocity = required_daily * velocity_noise
+
+    # forecasting logic
+    with np.errstate(divide="ignore", invalid="ignore"):
+        projected_days = remaining_hours / actual_velocity
+
+    forecast = np.where(
+        actual_velocity <= 0,
+        2,
+        np.where(
+            projected_days > days_remaining,
+            2,  # WILL MISS
+            np.where(
+                projected_days > days_remaining * 0.8,
+                1,  # AT RISK
+                0   # SAFE
+            )
+        )
+    ).astype(np.int64)
+
+    return {
+        "remaining_hours": remaining_hours,
+        "days_remaining": days_remaining,
+        "required_daily": required_daily,
+        "actual_velocity": actual_velocity,
+        "velocity_gap": required_daily - actual_velocity,
+        "remaining_ratio": remaining_hours / (remaining_hours + 1),
+        "workload_pressure": required_daily / DAILY_WORK_HOURS,
+        "allocation_ratio": required_daily / DAILY_WORK_HOURS,
+        "forecast_label": forecast
+    }
+
+
+def generate_synthetic_samples(n=1000, seed=None):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame(generate_synthetic_arrays(n, rng), columns=COLUMNS)
+
+
+def iter_synthetic_chunks(n, chunk_size=1_000_000, seed=None):
+    """
+    Streams n samples as DataFrames of at most chunk_size rows,
+    all drawn from one seeded generator.
+    """
+
+    rng = np.random.default_rng(seed)
+
+    for start in range(0, n, chunk_size):
+        size = min(chunk_size, n - start)
+        yield pd.DataFrame(generate_synthetic_arrays(size, rng), columns=COLUMNS)
+
+
+# ==================================================
+# PARALLEL SHARD WRITER
+# ==================================================
+
+def _write_shard(args):
+    path, size, seed_seq, fmt = args
+
+    arrays = generate_synthetic_arrays(size, np.random.default_rng(seed_seq))
+
+    if fmt == "parquet":
+        pd.DataFrame(arrays, columns=COLUMNS).to_parquet(path, index=False)
+    else:
+        np.savez(path, **arrays)
+
+    return path
+
+
+def write_synthetic_shards(n, out_dir, shard_size=1_000_000, fmt="npz", seed=None, max_workers=None):
+    """
+    Writes n samples as shard files (npz, or parquet if pyarrow /
+    fastparquet is installed), one worker process per shard.
+    Each shard gets an independent child stream of `seed`.
+    """
+
+    if fmt == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            import fastparquet  # noqa: F401
+
+    os.makedirs(out_dir, exist_ok=True)
+
+    sizes = [min(shard_size, n - start) for start in range(0, n, shard_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
 
-def generate_synthetic_samples(n=1000):
-    data = []
-
-    for _ in range(n):
-        remaining_hours = np.random.uniform(5, 300)
-        days_remaining = np.random.uniform(5, 180)
-
-        required_daily = remaining_hours / days_remaining
-
-        # simulate velocity variability
-        velocity_noise = np.random.uniform(0.2, 1.5)
-        actual_velocity = required_daily * velocity_noise
-
-        # forecasting logic
-        if actual_velocity <= 0:
-            forecast = 2
-        else:
-            projected_days = remaining_hours / actual_velocity
-
-            if projected_days > days_remaining:
-                forecast = 2  # WILL MISS
-            elif projected_days > days_remaining * 0.8:
-                forecast = 1  # AT RISK
-            else:
-                forecast = 0  # SAFE
-
-        velocity_gap = required_daily - actual_velocity
-        remaining_ratio = remaining_hours / (remaining_hours + 1)
-        workload_pressure = required_daily / DAILY_WORK_HOURS
-        allocation_ratio = required_daily / DAILY_WORK_HOURS
-
-        data.append([
-            remaining_hours,
-            days_remaining,
-            required_daily,
-            actual_velocity,
-            velocity_gap,
-            remaining_ratio,
-            workload_pressure,
-            allocation_ratio,
-            forecast
-        ])
-
-    columns = [
-        "remaining_hours",
-        "days_remaining",
-        "required_daily",
-        "actual_velocity",
-        "velocity_gap",
-        "remaining_ratio",
-        "workload_pressure",
-        "allocation_ratio",
-        "forecast_label"
+    jobs = [
+        (os.path.join(out_dir, f"synthetic_{i:05d}.{fmt}"), size, seed_seq, fmt)
+        for i, (size, seed_seq) in enumerate(zip(sizes, seeds))
     ]
 
-    df = pd.DataFrame(data, columns=columns)
-    return df
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(_write_shard, jobs))
 
 
 if __name__ == "__main__":
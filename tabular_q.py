@@ -0,0 +1,272 @@
+import ast
+
+import numpy as np
+
+# ==================================================
+# STATE DISCRETISATION
+# ==================================================
+# Bin edges per field of compute_execution_embedding (14 features).
+# Dimensions beyond this list fall back to DEFAULT_EDGES.
+
+EXECUTION_BIN_EDGES = [
+    [5, 10, 20, 40, 80, 160, 320],            # remaining hours
+    [3, 7, 14, 30, 60, 120],                  # days remaining
+    [0.5, 1, 2, 3, 4, 6, 8],                  # required daily
+    [0.5, 1, 2, 3, 4, 6, 8],                  # actual velocity
+    [0.5, 0.8, 0.9, 0.95, 0.99],              # remaining ratio
+    [0.25, 0.5, 0.75, 1, 1.5, 2],             # pressure
+    [-2, -1, -0.25, 0.25, 1, 2],              # velocity gap
+    [2, 4, 6, 8, 10],                         # adaptive capacity
+    [0.5], [0.5], [0.5],                      # phase one-hot
+    [0.5], [0.5], [0.5],                      # padding
+]
+
+DEFAULT_EDGES = [-10, -1, -0.1, 0.1, 1, 10, 100]
+
+DENSE_LIMIT = 1_000_000  # allocate the full matrix up to this many states
+
+
+class StateEncoder:
+    """
+    Maps an embedding to one integer: each dimension is binned against
+    its edges (np.searchsorted) and the bin indices are combined mixed-radix.
+    """
+
+    def __init__(self, bin_edges=EXECUTION_BIN_EDGES, default_edges=DEFAULT_EDGES):
+        self.bin_edges = [np.asarray(e, dtype=np.float64) for e in bin_edges]
+        self.default_edges = np.asarray(default_edges, dtype=np.float64)
+        self._layout = {}
+
+    def _edges_for(self, n_dims):
+        if n_dims not in self._layout:
+            edges = [
+                self.bin_edges[i] if i < len(self.bin_edges) else self.default_edges
+                for i in range(n_dims)
+            ]
+            radices = [len(e) + 1 for e in edges]
+
+            multipliers = []
+            m = 1
+            for r in radices:
+                multipliers.append(m)
+                m *= r
+
+            self._layout[n_dims] = (edges, multipliers, m)
+
+        return self._layout[n_dims]
+
+    def n_states(self, n_dims):
+        return self._edges_for(n_dims)[2]
+
+    def encode(self, embedding):
+        values = np.asarray(embedding, dtype=np.float64).ravel()
+        edges, multipliers, _ = self._edges_for(len(values))
+
+        return sum(
+            int(np.searchsorted(e, v, side="right")) * m
+            for e, v, m in zip(edges, values, multipliers)
+        )
+
+    def encode_batch(self, embeddings):
+        """
+        Vectorised encode for an (N x D) matrix -> int64 codes.
+        """
+
+        embeddings = np.asarray(embeddings, dtype=np.float64)
+        edges, multipliers, total = self._edges_for(embeddings.shape[1])
+
+        if total > np.iinfo(np.int64).max:
+            return np.array([self.encode(row) for row in embeddings], dtype=object)
+
+        codes = np.zeros(len(embeddings), dtype=np.int64)
+
+        for d, (e, m) in enumerate(zip(edges, multipliers)):
+            codes += np.searchsorted(e, embeddings[:, d], side="right").astype(np.int64) * m
+
+        return codes
+
+
+# ==================================================
+# ARRAY-BACKED Q TABLE
+# ==================================================
+
+class ArrayQTable:
+    """
+    Q-values in a float32 (rows x actions) matrix.
+
+    dense  : row = state code, whole matrix allocated up front
+    sparse : {state code: row} index over a matrix that grows by doubling
+    """
+
+    def __init__(self, actions, n_states=None, dense_limit=DENSE_LIMIT, capacity=1024):
+        self.actions = np.asarray(actions, dtype=np.float64)
+        self.dense = n_states is not None and n_states <= dense_limit
+
+        rows = n_states if self.dense else capacity
+        self.values = np.zeros((rows, len(actions)), dtype=np.float32)
+        self.index = None if self.dense else {}
+
+    def __len__(self):
+        return len(self.values) if self.dense else len(self.index)
+
+    def clear(self):
+        self.values[:] = 0
+
+        if not self.dense:
+            self.index.clear()
+
+    def action_index(self, action):
+        # Snap to the nearest action so off-grid allocations still update
+        return int(np.argmin(np.abs(self.actions - float(action))))
+
+    def row(self, code):
+        if self.dense:
+            return code
+
+        r = self.index.get(code)
+
+        if r is None:
+            r = len(self.index)
+
+            if r == len(self.values):
+                grown = np.zeros((2 * len(self.values), self.values.shape[1]), dtype=np.float32)
+                grown[:r] = self.values
+                self.values = grown
+
+            self.index[code] = r
+
+        return r
+
+    def rows(self, codes):
+        """
+        Row index for each code in an array (creating missing rows).
+        """
+
+        if self.dense:
+            return np.asarray(codes, dtype=np.int64)
+
+        unique, inverse = np.unique(codes, return_inverse=True)
+        unique_rows = np.array([self.row(int(code)) for code in unique], dtype=np.int64)
+
+        return unique_rows[inverse]
+
+    def best_action(self, code):
+        r = self.row(code)  # may grow self.values, so resolve before indexing
+        return float(self.actions[int(np.argmax(self.values[r]))])
+
+    def peek_best_action(self, code):
+        # best_action without adding an unseen state: safe for reader threads
+        r = code if self.dense else self.index.get(code)
+
+        if r is None:
+            return float(self.actions[0])   # unseen == all-zero row
+
+        return float(self.actions[int(np.argmax(self.values[r]))])
+
+    def td_update(self, prev_code, action, reward, next_code, alpha, gamma):
+        a = self.action_index(action)
+        prev_row = self.row(prev_code)
+        next_row = self.row(next_code)
+
+        current_q = float(self.values[prev_row, a])
+        max_next_q = float(self.values[next_row].max())
+
+        new_q = current_q + alpha * (reward + gamma * max_next_q - current_q)
+        self.values[prev_row, a] = new_q
+
+        return a, new_q
+
+    @property
+    def nbytes(self):
+        if self.dense:
+            return self.values.nbytes
+
+        import sys
+
+        # dict slots + boxed int keys/values + the used matrix rows
+        return (
+            sys.getsizeof(self.index)
+            + sum(sys.getsizeof(k) + sys.getsizeof(v) for k, v in self.index.items())
+            + len(self.index) * self.values.shape[1] * self.values.itemsize
+        )
+
+    # ---------------- Persistence (via QStore) ----------------
+
+    def to_dict(self):
+        if self.dense:
+            codes = np.flatnonzero(np.any(self.values != 0, axis=1))
+            items = ((int(c), int(c)) for c in codes)
+        else:
+            items = self.index.items()
+
+        labels = [str(a) for a in self.actions.tolist()]
+
+        return {
+            str(code): dict(zip(labels, self.values[r].tolist()))
+            for code, r in items
+        }
+
+    def load_dict(self, q_table, encoder):
+        """
+        Fills the table from {state_key: {action: q}}. Keys are integer
+        codes, or legacy "(x, y, ...)" rounded-embedding strings which are
+        re-encoded.
+        """
+
+        for key, actions in q_table.items():
+            if key.startswith("("):
+                code = encoder.encode(ast.literal_eval(key))
+            else:
+                code = int(key)
+
+            r = self.row(code)
+            for action, value in actions.items():
+                self.values[r, self.action_index(action)] = value
+
+        return self
+
+
+# ==================================================
+# MEMORY FOOTPRINT COMPARISON
+# ==================================================
+
+def _benchmark(n_states=1_000_000, dict_sample=100_000):
+    import random
+    import tracemalloc
+
+    actions = [0.5, 1, 2, 3, 4, 5]
+    encoder = StateEncoder()
+    rng = random.Random(0)
+
+    def random_embedding():
+        return [rng.uniform(0, 300), rng.uniform(1, 180), rng.uniform(0, 8),
+                rng.uniform(0, 8), rng.random(), rng.uniform(0, 2),
+                rng.uniform(-3, 3), 6, 1, 0, 0, 0, 0, 0]
+
+    # Legacy dict-of-dicts: measured on a sample, scaled to n_states
+    tracemalloc.start()
+    legacy = {}
+    for _ in range(dict_sample):
+        key = str(tuple(round(float(x), 2) for x in random_embedding()))
+        legacy[key] = {str(a): rng.random() for a in actions}
+    legacy_bytes = tracemalloc.get_traced_memory()[0] * n_states / dict_sample
+    tracemalloc.stop()
+    del legacy
+
+    sparse = ArrayQTable(actions)
+    for code in range(n_states):
+        r = sparse.row(code * 7919)
+        sparse.values[r] = 1.0
+
+    dense = ArrayQTable(actions, n_states=n_states)
+
+    mb = 1024 * 1024
+    print(f"{n_states:,} states x {len(actions)} actions")
+    print(f"dict of str keys (scaled) {legacy_bytes / mb:10.1f} MB")
+    print(f"ArrayQTable sparse        {sparse.nbytes / mb:10.1f} MB")
+    print(f"ArrayQTable dense         {dense.nbytes / mb:10.1f} MB")
+    print(f"example state code        {encoder.encode(random_embedding())}")
+
+
+if __name__ == "__main__":
+    _benchmark()
@@ -0,0 +1,175 @@
+import random
+
+import numpy as np
+
+from q_store import QStore
+from tabular_q import ArrayQTable, StateEncoder
+
+
+# ==================================================
+# UNIFIED TABULAR TD ENGINE
+# ==================================================
+
+class TDEngine:
+    """
+    Tabular Q-learning over an ArrayQTable persisted through a QStore.
+
+    update_q      : one online TD(0) step (what every work log triggers)
+    batch_update  : vectorised synchronous sweeps over many transitions
+    replay_from_db: batch_update over the whole transitions table, e.g.
+                    after the reward function or ALPHA / GAMMA change
+    """
+
+    def __init__(self, q_path, actions, alpha, gamma, epsilon, encoder=None):
+        self.actions = list(actions)
+        self.alpha = alpha
+        self.gamma = gamma
+        self.epsilon = epsilon
+        self.encoder = encoder or StateEncoder()
+        self.store = QStore(q_path, self.actions)
+        self.q_table = self.load()
+
+    def load(self):
+        return ArrayQTable(self.actions).load_dict(self.store.load(), self.encoder)
+
+    def save(self):
+        self.store.compact(self.q_table)
+
+    def normalize_state(self, embedding):
+        return self.encoder.encode(embedding)
+
+    # ---------------- Online ----------------
+
+    def choose_action(self, embedding, max_capacity, epsilon=None):
+        epsilon = self.epsilon if epsilon is None else epsilon
+
+        state_code = self.normalize_state(embedding)
+
+        if random.random() < epsilon:
+            return random.choice(self.actions)
+
+        return min(self.q_table.best_action(state_code), max_capacity)
+
+    def greedy_action(self, embedding, max_capacity):
+        """
+        choose_action without exploration and without touching the
+        table, for suggestions shown to the operator.
+        """
+
+        return min(self.q_table.peek_best_action(self.normalize_state(embedding)), max_capacity)
+
+    def update_q(self, prev_embedding, action, reward, next_embedding, alpha=None, gamma=None):
+        alpha = self.alpha if alpha is None else alpha
+        gamma = self.gamma if gamma is None else gamma
+
+        prev_code = self.normalize_state(prev_embedding)
+        next_code = self.normalize_state(next_embedding)
+
+        a, new_q = self.q_table.td_update(prev_code, action, reward, next_code, alpha, gamma)
+
+        # Append just this cell; full snapshot only every COMPACT_EVERY updates
+        self.store.record(str(prev_code), self.actions[a], new_q, self.q_table)
+
+        return new_q
+
+    # ---------------- Batch ----------------
+
+    def batch_update(self, states, actions, rewards, next_states, alpha=None, gamma=None, sweeps=1):
+        """
+        Each sweep computes every TD target from the same Q snapshot, then
+        moves each (state, action) cell by its mean TD error. A cell hit k
+        times moves by 1 - (1 - alpha)^k, i.e. as far as k sequential
+        steps toward a common target would. Returns the mean |TD error|
+        of the last sweep.
+        """
+
+        alpha = self.alpha if alpha is None else alpha
+        gamma = self.gamma if gamma is None else gamma
+
+        table = self.q_table
+        n_actions = len(self.actions)
+
+        prev_rows = table.rows(self.encoder.encode_batch(states))
+        next_rows = table.rows(self.encoder.encode_batch(next_states))
+        action_idx = np.abs(
+            np.asarray(actions, dtype=np.float64)[:, None] - table.actions[None, :]
+        ).argmin(axis=1)
+        rewards = np.asarray(rewards, dtype=np.float64)
+
+        cells, inverse, counts = np.unique(
+            prev_rows * n_actions + action_idx,
+            return_inverse=True,
+            return_counts=True
+        )
+        step = 1 - (1 - alpha) ** counts
+
+        # rows() above may have grown the matrix -> take the view only now
+        flat = table.values.reshape(-1)
+        td_error = np.zeros(len(rewards))
+
+        for _ in range(sweeps):
+            values = table.values
+            targets = rewards + gamma * values[next_rows].max(axis=1)
+            td_error = targets - values[prev_rows, action_idx]
+
+            mean_error = np.bincount(inverse, weights=td_error, minlength=len(cells)) / counts
+            flat[cells] += (step * mean_error).astype(flat.dtype)
+
+        return float(np.abs(td_error).mean()) if len(td_error) else 0.0
+
+    def batch_update_q(self, states, actions, rewards, next_states, alpha=None, gamma=None):
+        """
+        batch_update, then appends just the (state, action) cells it
+        touched to the store log, as update_q does for one cell.
+        """
+
+        error = self.batch_update(states, actions, rewards, next_states, alpha, gamma)
+
+        codes = self.encoder.encode_batch(states)
+        action_idx = np.abs(
+            np.asarray(actions, dtype=np.float64)[:, None] - self.q_table.actions[None, :]
+        ).argmin(axis=1)
+
+        cells = np.unique(np.stack([codes, action_idx], axis=1), axis=0)
+        rows = self.q_table.rows(cells[:, 0])
+        values = self.q_table.values[rows, cells[:, 1]]
+
+        self.store.record_many(
+            (
+                (str(int(code)), self.actions[int(a)], float(value))
+                for (code, a), value in zip(cells, values)
+            ),
+            self.q_table
+        )
+
+        return error
+
+    def replay_from_db(self, alpha=None, gamma=None, sweeps=50, reset=True):
+        """
+        Rebuilds (or refines) the table from every logged transition
+        in one vectorised pass per sweep, then writes a fresh snapshot.
+        """
+
+        from database import load_transitions
+
+        batch = load_transitions()
+
+        if batch is None:
+            return 0
+
+        if reset:
+            self.q_table.clear()
+
+        self.batch_update(
+            batch["states"],
+            batch["actions"],
+            batch["rewards"],
+            batch["next_states"],
+            alpha=alpha,
+            gamma=gamma,
+            sweeps=sweeps
+        )
+
+        self.save()
+
+        return len(batch["ids"])
@@ -1,6 +1,4 @@
-import json
-import os
-import random
+from td_engine import TDEngine
 
 Q_PATH = "q_table.json"
 
@@ -11,59 +9,51 @@ GAMMA = 0.9
 EPSILON = 0.1
 
 
-def load_q():
-    if not os.path.exists(Q_PATH):
-        return {}
+engine = TDEngine(Q_PATH, ACTIONS, ALPHA, GAMMA, EPSILON)
 
-    with open(Q_PATH, "r") as f:
-        return json.load(f)
+store = engine.store
+encoder = engine.encoder
+q_table = engine.q_table
 
 
-def save_q(q_table):
-    with open(Q_PATH, "w") as f:
-        json.dump(q_table, f)
+def load_q():
+    return engine.load()
 
 
-q_table = load_q()
+def save_q(q_table):
+    store.compact(q_table)
 
 
 def normalize_state(state_tuple):
-    return str(tuple(round(float(x), 2) for x in state_tuple))
+    return engine.normalize_state(state_tuple)
 
 
 def choose_action(state_tuple, max_capacity):
-
-    state_key = normalize_state(state_tuple)
-
-    if random.random() < EPSILON:
-        return random.choice(ACTIONS)
-
-    if state_key not in q_table:
-        q_table[state_key] = {str(a): 0 for a in ACTIONS}
-
-    best_action = max(q_table[state_key], key=q_table[state_key].get)
-
-    return min(float(best_action), max_capacity)
+    return engine.choose_action(state_tuple, max_capacity, epsilon=EPSILON)
 
 
 def update_q(prev_state, action, reward, next_state):
+    engine.update_q(prev_state, action, reward, next_state, alpha=ALPHA, gamma=GAMMA)
 
-    prev_key = normalize_state(prev_state)
-    next_key = normalize_state(next_state)
 
-    if prev_key not in q_table:
-        q_table[prev_key] = {str(a): 0 for a in ACTIONS}
+def replay_transitions(sweeps=50):
+    """
+    Recomputes the whole table from the logged transitions with the
+    current ALPHA / GAMMA.
+    """
 
-    if next_key not in q_table:
-        q_table[next_key] = {str(a): 0 for a in ACTIONS}
+    return engine.replay_from_db(alpha=ALPHA, gamma=GAMMA, sweeps=sweeps)
 
-    current_q = q_table[prev_key][str(action)]
-    max_next_q = max(q_table[next_key].values())
 
-    new_q = current_q + ALPHA * (
-        reward + GAMMA * max_next_q - current_q
-    )
+def update_q_batch(prev_states, actions, rewards, next_states):
+    """
+    One vectorised TD sweep over a batch of transitions; only the
+    touched cells are appended to the store log.
+    """
 
-    q_table[prev_key][str(action)] = new_q
+    if len(rewards) == 0:
+        return 0.0
 
-    save_q(q_table)
+    return engine.batch_update_q(
+        prev_states, actions, rewards, next_states, alpha=ALPHA, gamma=GAMMA
+    )
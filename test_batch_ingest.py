@@ -0,0 +1,33 @@
+import io
+
+import pytest
+
+from batch_ingest import CommandError, ingest, parse_command
+
+
+@pytest.mark.parametrize("line", [
+    '{"command": "add_goal", "title": "g", "deadline_days": NaN}',
+    '{"command": "add_goal", "title": "g", "deadline_days": Infinity}',
+    '{"command": "add_goal", "title": "g", "deadline_days": 1e9}',
+    '{"command": "add_milestone", "goal_id": 1, "title": "m", "total_hours": -Infinity}',
+    '{"command": "log_work", "milestone_id": 1, "hours": NaN}',
+])
+def test_parse_command_rejects_non_finite_and_huge(line):
+    with pytest.raises(CommandError):
+        parse_command(line)
+
+
+def test_non_finite_line_is_rejected_not_fatal(temp_db):
+    from database import get_goals
+
+    stream = io.StringIO(
+        '{"command": "add_goal", "title": "ok", "deadline_days": 10}\n'
+        '{"command": "add_goal", "title": "bad", "deadline_days": Infinity}\n'
+        '{"command": "add_goal", "title": "bad", "deadline_days": NaN}\n'
+    )
+
+    result = ingest(stream, out=io.StringIO())
+
+    assert result.counts["add_goal"] == 1
+    assert result.counts["invalid"] == 2
+    assert [g["title"] for g in get_goals()] == ["ok"]
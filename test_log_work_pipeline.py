@@ -0,0 +1,55 @@
+from db_connection import get_connection, transaction
+from database import insert_goal, insert_milestone
+from log_work_pipeline import LogWorkPipeline
+
+
+def _milestone_with_plan(plan=True):
+    with transaction() as c:
+        goal_id = insert_goal(c, "g", 30)
+        milestone_id = insert_milestone(c, goal_id, "m", 100)
+
+        if plan:
+            c.execute("""
+            INSERT INTO plan_logs
+            (milestone_id, remaining_hours, days_remaining, required_daily,
+             actual_velocity, allocated_today, forecast)
+            VALUES (?, 100, 30, 3, 2, 3, 'SAFE')
+            """, (milestone_id,))
+
+    return milestone_id
+
+
+def _count(table):
+    return get_connection().execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+
+def test_log_then_flush_writes_rewards_and_transitions(temp_db, temp_q_store):
+    milestone_id = _milestone_with_plan()
+    pipeline = LogWorkPipeline(flush_seconds=0.01)
+
+    assert pipeline.log(milestone_id, 2.0) == (2.0, 98.0, True)
+    assert pipeline.log(milestone_id, 1.0) == (3.0, 97.0, True)
+
+    pipeline.flush()
+
+    assert pipeline.status() == {"queued": 0, "learned": 2, "failed": 0, "last_error": None}
+    assert _count("transitions") == 2
+
+    reward = get_connection().execute("SELECT reward FROM plan_logs").fetchone()[0]
+    assert reward is not None
+
+    # Only the touched Q cells were appended, no snapshot rewrite
+    assert temp_q_store._pending > 0
+
+
+def test_require_plan_writes_nothing_without_a_plan(temp_db, temp_q_store):
+    milestone_id = _milestone_with_plan(plan=False)
+    pipeline = LogWorkPipeline()
+
+    assert pipeline.log(milestone_id, 2.0, require_plan=True) is None
+
+    pipeline.flush()
+
+    assert _count("logs") == 0
+    assert _count("transitions") == 0
+    assert pipeline.status()["learned"] == 0
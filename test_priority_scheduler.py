@@ -0,0 +1,77 @@
+import itertools
+import random
+
+import pytest
+
+from priority_scheduler import PriorityScheduler
+
+
+def _value(plan, priorities):
+    return sum(priorities[m] * hours for m, _, hours in plan)
+
+
+def _build(capacity, mode, milestones):
+    scheduler = PriorityScheduler(capacity, mode=mode)
+    for milestone_id, priority, units in milestones:
+        scheduler.add(milestone_id, priority, units)
+    return scheduler
+
+
+def _random_milestones(rng, n_milestones=4, max_units=3):
+    milestones = []
+    unit_id = 0
+
+    for milestone_id in range(1, n_milestones + 1):
+        units = []
+        for _ in range(rng.randint(1, max_units)):
+            unit_id += 1
+            units.append({"id": unit_id, "hours": rng.randint(1, 30) / 10})
+        milestones.append((milestone_id, rng.uniform(0.1, 3), units))
+
+    return milestones
+
+
+def _best_value(capacity, milestones):
+    # Brute force over every subset of units
+    units = [(p, u["hours"]) for _, p, us in milestones for u in us]
+    best = 0.0
+
+    for mask in itertools.product((0, 1), repeat=len(units)):
+        hours = sum(h for (_, h), take in zip(units, mask) if take)
+        if hours <= capacity + 1e-9:
+            best = max(best, sum(p * h for (p, h), take in zip(units, mask) if take))
+
+    return best
+
+
+@pytest.mark.parametrize("capacity", [0.3, 1.7, 2.9, 4.1, 6.0])
+def test_knapsack_is_optimal_and_beats_greedy_on_fractional_capacities(capacity):
+    rng = random.Random(int(capacity * 10))
+
+    for _ in range(20):
+        milestones = _random_milestones(rng)
+        priorities = {m: p for m, p, _ in milestones}
+
+        knapsack = _build(capacity, "knapsack", milestones).schedule()
+        greedy = _build(capacity, "greedy", milestones).schedule()
+
+        assert sum(h for _, _, h in knapsack) <= capacity + 1e-9
+        assert _value(knapsack, priorities) >= _value(greedy, priorities) - 1e-9
+        assert _value(knapsack, priorities) == pytest.approx(_best_value(capacity, milestones))
+
+
+def test_capacity_just_below_a_slot_boundary_keeps_the_slot():
+    # 0.3 / 0.1 == 2.9999999999999996
+    scheduler = _build(0.3, "knapsack", [(1, 1.0, [{"id": i, "hours": 0.1} for i in range(3)])])
+
+    assert len(scheduler.schedule()) == 3
+
+
+def test_same_weight_bucket_keeps_the_higher_value_unit():
+    # 0.95 h and 1.0 h both take 10 slots; 0.99 * 1.0 > 1.0 * 0.95
+    scheduler = _build(1.0, "knapsack", [
+        (1, 1.0, [{"id": 1, "hours": 0.95}]),
+        (2, 0.99, [{"id": 2, "hours": 1.0}]),
+    ])
+
+    assert scheduler.schedule() == [(2, 2, 1.0)]
@@ -0,0 +1,86 @@
+from db_connection import get_connection, transaction
+from database import (
+    insert_goal,
+    insert_milestone,
+    log_work,
+    verify_logged_hours,
+    get_logged_hours
+)
+
+
+def _milestones(n=2):
+    with transaction() as c:
+        goal_id = insert_goal(c, "g", 30)
+        return [insert_milestone(c, goal_id, f"m{i}", 100) for i in range(n)]
+
+
+def _rollup_drift():
+    # daily_rollup rows that disagree with a fresh aggregation of the sources
+    c = get_connection().cursor()
+    expected = {}
+
+    c.execute("SELECT DATE(timestamp), milestone_id, allocated_today FROM plan_logs")
+    for date, milestone_id, hours in c.fetchall():
+        row = expected.setdefault((date, milestone_id), [0.0, 0.0, 0, 0])
+        row[0] += hours
+        row[2] += 1
+
+    c.execute("SELECT DATE(timestamp), milestone_id, hours_logged FROM logs")
+    for date, milestone_id, hours in c.fetchall():
+        row = expected.setdefault((date, milestone_id), [0.0, 0.0, 0, 0])
+        row[1] += hours
+        row[3] += 1
+
+    c.execute("""
+    SELECT date, milestone_id, allocated, logged, plan_count, log_count
+    FROM daily_rollup
+    WHERE plan_count != 0 OR log_count != 0
+    """)
+    stored = {(r[0], r[1]): list(r[2:]) for r in c.fetchall()}
+
+    return {
+        key: (expected.get(key), stored.get(key))
+        for key in expected.keys() | stored.keys()
+        if expected.get(key) != stored.get(key)
+    }
+
+
+def test_logged_hours_follow_insert_update_delete(temp_db):
+    a, b = _milestones()
+
+    assert log_work(a, 2.5) == (2.5, 97.5)
+    log_work(a, 1.5)
+    log_work(b, 4.0)
+
+    with transaction() as c:
+        c.execute("UPDATE logs SET hours_logged = 3.0 WHERE milestone_id = ? AND hours_logged = 1.5", (a,))
+        c.execute("UPDATE logs SET milestone_id = ? WHERE milestone_id = ? AND hours_logged = 4.0", (a, b))
+        c.execute("DELETE FROM logs WHERE hours_logged = 2.5")
+
+    assert get_logged_hours(a) == 7.0
+    assert get_logged_hours(b) == 0.0
+    assert verify_logged_hours() == []
+
+
+def test_daily_rollup_matches_source_tables(temp_db):
+    a, b = _milestones()
+
+    with transaction() as c:
+        c.executemany("""
+        INSERT INTO plan_logs (milestone_id, allocated_today, forecast, timestamp)
+        VALUES (?, ?, 'SAFE', ?)
+        """, [(a, 3, "2026-01-01 10:00:00"), (b, 2, "2026-01-01 11:00:00"), (a, 4, "2026-01-02 09:00:00")])
+        c.executemany("""
+        INSERT INTO logs (milestone_id, hours_logged, timestamp)
+        VALUES (?, ?, ?)
+        """, [(a, 1.5, "2026-01-01 12:00:00"), (a, 2, "2026-01-02 12:00:00"), (b, 1, "2026-01-02 13:00:00")])
+
+    assert _rollup_drift() == {}
+
+    with transaction() as c:
+        c.execute("UPDATE logs SET timestamp = '2026-01-03 08:00:00' WHERE hours_logged = 2")
+        c.execute("UPDATE plan_logs SET milestone_id = ? WHERE allocated_today = 4", (b,))
+        c.execute("DELETE FROM logs WHERE hours_logged = 1.5")
+
+    assert _rollup_drift() == {}
+    assert verify_logged_hours() == []
@@ -2,7 +2,7 @@ from synthetic_data import generate_synthetic_samples
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import classification_report, confusion_matrix
-import joblib
+from model_registry import save_model
 
 
 def train():
@@ -36,7 +36,7 @@ def train():
     print(confusion_matrix(y_test, y_pred))
 
     # Save model
-    joblib.dump(model, "deadline_risk_model.pkl")
+    save_model(model, "deadline_risk_model.pkl")
     print("\nModel saved as deadline_risk_model.pkl")
 
 